@@ -0,0 +1,95 @@
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from dataimport import fgteams, parseGameLogs
+
+'''
+syntheticLogs(seasons, seed)
+    INPUT
+seasons: number of seasons to generate (30 teams x 162 games each, both team perspectives)
+seed: random seed
+    OUTPUT
+DataFrame shaped like concatenated schedule_and_record output, including doubleheader dates ("Saturday, Jul 8 (1)")
+and unplayed games (no Attendance)
+'''
+def syntheticLogs(seasons, seed=0):
+    rng = np.random.default_rng(seed)
+    n = seasons * len(fgteams) * 162
+    days = pd.to_datetime('2001-03-28') + pd.to_timedelta(rng.integers(0, 185, n), unit='D')
+    dh = rng.choice(['', ' (1)', ' (2)'], n, p=[0.96, 0.02, 0.02])
+    teams = np.array(list(fgteams.values()))
+    return pd.DataFrame({'Date': days.strftime('%A, %b ') + days.day.astype(str) + dh,
+                         'Tm': rng.choice(teams, n),
+                         'Home_Away': rng.choice(['Home', '@'], n),
+                         'Opp': rng.choice(teams, n),
+                         'R': rng.integers(0, 15, n),
+                         'RA': rng.integers(0, 15, n),
+                         'Time': [str(h) + ':' + str(m).zfill(2) for h, m in zip(rng.integers(2, 5, n), rng.integers(0, 60, n))],
+                         'D/N': rng.choice(['D', 'N'], n),
+                         'Attendance': np.where(rng.random(n) < 0.01, np.nan, rng.integers(5000, 50000, n)),
+                         'Season': np.repeat(np.arange(2001, 2001 + seasons), n // seasons)})
+
+'''
+legacyParse(gl)
+    NOTES
+Row-wise parsing as gameLogs did it before parseGameLogs, kept here as the benchmark baseline
+'''
+def legacyParse(gl):
+    dict = {
+    'Mar':'03',
+    'Apr':'04',
+    'May':'05',
+    'Jun':'06',
+    'Jul':'07',
+    'Aug':'08',
+    'Sep':'09',
+    'Oct':'10'
+    }
+    gl = gl.copy()
+    gl['R_tot'] = gl['R'] + gl['RA']
+    gl['R_diff'] = gl.apply(lambda x: x['R']-x['RA'] if x['R']>x['RA'] else x['RA']-x['R'],axis=1)
+    gl['Date_split'] = gl['Date'].apply(lambda x: x.split(',')[1])
+    gl['Day'] = gl['Date_split'].apply(lambda x: x.split(' ')[2])
+    gl['Day'] = gl['Day'].apply(lambda x: '0'+x if int(x)<10 else x)
+    gl['Month'] = gl['Date_split'].apply(lambda x: x.split(' ')[1])
+    gl['Month'] = gl['Month'].map(dict)
+    gl.dropna(subset=['Attendance'], inplace=True)
+    gl['Time'] = gl['Time'].apply(lambda x: int(x.split(':')[0])*60 + int(x.split(':')[1]))
+    return gl[['Day','Month','Season','Tm','Opp','Time','D/N','Attendance']]
+
+def best(func, gl, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = func(gl)
+        times.append(time.perf_counter() - start)
+    return min(times), out
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Row-wise parsing of both team rows vs vectorized parsing of home rows on a synthetic log')
+    parser.add_argument('--seasons', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    gl = syntheticLogs(args.seasons)
+    old_t, old = best(legacyParse, gl, args.repeat)
+    new_t, new = best(parseGameLogs, gl, args.repeat)
+
+    # the legacy parse keeps both team perspectives; parseGameLogs keeps the home row of each game
+    old = old[gl.loc[old.index, 'Home_Away'] != '@'].rename(columns={'Tm':'Home', 'Opp':'Away'})
+    cols = ['Day', 'Month', 'Season', 'Home', 'Away', 'Time', 'D/N', 'Attendance']
+    same = (old.reset_index(drop=True)[cols].astype(str) == new[cols].astype(str)).all().all()
+    # missing dates and times must come out as NaT/NA, not borrow another game's values
+    holes = gl.dropna(subset=['Attendance']).head(4).assign(Home_Away='Home')
+    holes.iloc[0, holes.columns.get_indexer(['Date', 'Time'])] = None
+    parsed = parseGameLogs(holes)
+    same = same and pd.isna(parsed.loc[0, 'Date']) and pd.isna(parsed.loc[0, 'Time']) and parsed.loc[1:, 'Date'].notna().all()
+    print('%d rows, %d games kept (%d seasons)' % (len(gl), len(new), args.seasons))
+    print('row-wise:   %8.3f s' % old_t)
+    print('vectorized: %8.3f s' % new_t)
+    print('speedup:    %8.1fx  (outputs match: %s)' % (old_t / new_t, same))
+
+if __name__ == '__main__':
+    sys.exit(main())
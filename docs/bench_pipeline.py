@@ -0,0 +1,146 @@
+import os
+import sys
+import json
+import shutil
+import time
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import pandas as pd
+
+# cases: what each benchmark times; genFielding gets its ID frame prepared outside the timed region and backfill
+# streams one season at a time into a scratch store
+cases = ['fgBatting', 'statBatting', 'gameLogs', 'genFielding', 'master', 'backfill']
+
+# spans: number of seasons per run (ending at --end)
+spans = [1, 5, 20]
+
+'''
+rowCount(out)
+    OUTPUT
+total rows of a DataFrame or of a list of DataFrames
+'''
+def rowCount(out):
+    return sum(len(df) for df in out) if isinstance(out, list) else len(out)
+
+'''
+runCase(case, start_year, end_year)
+    NOTES
+Runs in a fresh child process so peak RSS belongs to the case alone. Sources are replayed from fixtures (no network),
+the on-disk cache and rate limits are switched off and bWAR partitions go to a scratch directory, removed afterwards.
+    OUTPUT
+dict with wall time, peak RSS and rows per second
+'''
+def runCase(case, start_year, end_year):
+    import cache
+    import fetch
+    import store
+    import replay
+    import dataimport as di
+    cache.enabled = False
+    cache.cache_dir = tempfile.mkdtemp(prefix='sac_bench_')
+    fetch.limiter.rates = {}
+    if replay.mode == 'off':
+        replay.mode = 'replay'
+
+    try:
+        session = di.Session()
+        if case == 'genFielding':
+            id = di.genID(di.fgBatting(start_year, end_year, session), session)
+            run = lambda: di.genFielding(id, start_year, end_year)
+        elif case == 'backfill':
+            path = os.path.join(cache.cache_dir, 'store')
+            run = lambda: di.backfill(path, start_year, end_year, session)
+        elif case in ('fgBatting', 'gameLogs', 'master'):
+            run = lambda: getattr(di, case)(start_year, end_year, session)
+        else:
+            run = lambda: getattr(di, case)(start_year, end_year)
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        out = run()
+        wall = time.perf_counter() - start
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        rows = rowCount(list(store.load(path).values()) if case == 'backfill' else out)
+        return {'case': case,
+                'seasons': end_year - start_year + 1,
+                'wall_s': wall,
+                'peak_rss_mb': peak / 1024,
+                'rss_before_mb': rss_before / 1024,
+                'rows': rows,
+                'rows_per_s': rows / wall if wall else None}
+    finally:
+        shutil.rmtree(cache.cache_dir, ignore_errors=True)
+
+'''
+compare(old, new)
+    OUTPUT
+DataFrame of wall time / peak RSS ratios (new / old) per case and span
+'''
+def compare(old, new):
+    keys = ['case', 'seasons']
+    old = pd.DataFrame(old['results']).set_index(keys)
+    new = pd.DataFrame(new['results']).set_index(keys)
+    return (new[['wall_s', 'peak_rss_mb']] / old[['wall_s', 'peak_rss_mb']]).add_suffix('_ratio').dropna()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline benchmarks for the dataimport pipeline (replays recorded sources)')
+    parser.add_argument('--end', type=int, default=2023, help='last season of every span')
+    parser.add_argument('--cases', nargs='+', default=cases, choices=cases)
+    parser.add_argument('--spans', nargs='+', type=int, default=spans)
+    parser.add_argument('--record', action='store_true', help='call the live sources once and save fixtures')
+    parser.add_argument('--out', default='bench_results.json', help='where to write results')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    parser.add_argument('--start', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.case:
+        print(json.dumps(runCase(args.case, args.start, args.end)))
+        return
+
+    if args.record:
+        import bwar
+        import replay
+        import dataimport as di
+        replay.mode = 'record'
+        # the bWAR files are only read when the local copy is stale, so record them explicitly
+        bwar.download('bat')
+        bwar.download('pitch')
+        for span in args.spans:
+            di.master(args.end - span + 1, args.end)
+            # backfill runs master() one season at a time, which makes different (per-season) source calls
+            for _ in di.masterSeasons(args.end - span + 1, args.end):
+                pass
+        print('fixtures recorded in %s' % replay.fixture_dir)
+        return
+
+    results = []
+    for case in args.cases:
+        for span in args.spans:
+            cmd = [sys.executable, os.path.abspath(__file__), '--case', case, '--start', str(args.end - span + 1), '--end', str(args.end)]
+            proc = subprocess.run(cmd, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+            if proc.returncode:
+                print('%s (%d seasons) failed:\n%s' % (case, span, proc.stderr), file=sys.stderr)
+                continue
+            results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+            print('%-12s %2d seasons  %8.2f s  %8.1f MB  %10.0f rows/s' % (case, span, results[-1]['wall_s'],
+                                                                         results[-1]['peak_rss_mb'], results[-1]['rows_per_s'] or 0))
+
+    report = {'created': time.time(),
+              'python': platform.python_version(),
+              'pandas': pd.__version__,
+              'end': args.end,
+              'results': results}
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=1)
+    print('results written to %s' % args.out)
+
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare(json.load(f), report).to_string())
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+import os
+import json
+import time
+import shutil
+import datetime
+import threading
+import requests
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import cache
+import fetch
+import store
+import replay
+import instrument
+
+# war_urls: Baseball-Reference daily WAR files (the same files pyb.bwar_bat/bwar_pitch download)
+war_urls = {
+    'bat': 'https://www.baseball-reference.com/data/war_daily_bat.txt',
+    'pitch': 'https://www.baseball-reference.com/data/war_daily_pitch.txt'
+}
+
+# drop_war: columns never used downstream, skipped while parsing
+drop_war = ['name_common', 'player_ID', 'age', 'lg_ID']
+
+# text_war: non-numeric columns; everything else is parsed as float64 so every chunk writes the same schema
+text_war = ['team_ID', 'pitcher']
+
+# chunksize: rows parsed at a time while streaming a WAR file
+chunksize = 50000
+
+locks = {kind: threading.Lock() for kind in war_urls}
+
+'''
+warDir()
+    OUTPUT
+directory of the season-partitioned local copies (inside the source cache directory)
+'''
+def warDir():
+    return os.path.join(cache.cache_dir, 'bwar')
+
+'''
+warFile(kind)
+    INPUT
+kind: 'bat' or 'pitch'
+    OUTPUT
+file-like object streaming the raw WAR file (the caller closes it)
+'''
+def warFile(kind):
+    fetch.limiter.wait('www.baseball-reference.com')
+    resp = requests.get(war_urls[kind], stream=True, timeout=60)
+    resp.raise_for_status()
+    resp.raw.decode_content = True
+    return resp.raw
+
+warFile = replay.recordedStream(warFile)
+
+def warMeta(kind):
+    try:
+        with open(os.path.join(warDir(), kind, '_meta.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+'''
+isFresh(kind, start_year, end_year)
+    OUTPUT
+True if the local copy covers the seasons: seasons that were finished when the copy was fetched never expire, anything
+later expires after cache.ttl
+'''
+def isFresh(kind, start_year, end_year):
+    info = warMeta(kind)
+    if info is None:
+        return False
+    # the last season in the file is final only if the file was fetched after that season's year ended
+    final = info['last'] if datetime.date.fromtimestamp(info['fetched']).year > info['last'] else info['last'] - 1
+    if end_year < cache.currentSeason() and end_year <= final:
+        return True
+    return time.time() - info['fetched'] < cache.ttl
+
+'''
+download(kind)
+    NOTES
+Streams the WAR file chunk by chunk, writing each chunk's rows straight into Season partitions of a fresh local copy,
+so memory holds one chunk at a time no matter how long the history is. The new copy replaces the old one only
+once the whole file has been read.
+'''
+def download(kind):
+    root = os.path.join(warDir(), kind)
+    tmp = root + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    first, last = None, None
+    raw = warFile(kind)
+    try:
+        chunks = pd.read_csv(raw, chunksize=chunksize, usecols=lambda col: col not in drop_war, na_values=['NULL'],
+                             dtype={col: 'str' for col in text_war})
+        for n, chunk in enumerate(chunks):
+            chunk = chunk.rename(columns={'mlb_ID':'key_mlbam', 'year_ID':'Season', 'team_ID':'Team'})
+            chunk = chunk.dropna(subset=['Season'])
+            numeric = [col for col in chunk.columns if col not in text_war + ['Team', 'Season']]
+            chunk[numeric] = chunk[numeric].apply(pd.to_numeric, errors='coerce').astype('float64')
+            chunk['Season'] = chunk['Season'].astype('int64')
+            first = chunk['Season'].min() if first is None else min(first, chunk['Season'].min())
+            last = chunk['Season'].max() if last is None else max(last, chunk['Season'].max())
+            pq.write_to_dataset(pa.Table.from_pandas(chunk, preserve_index=False), tmp, partitioning=store.partitioning,
+                                basename_template='chunk%d-{i}.parquet' % n)
+    finally:
+        raw.close()
+    with open(os.path.join(tmp, '_meta.json'), 'w') as f:
+        json.dump({'fetched': time.time(), 'first': int(first), 'last': int(last)}, f)
+    shutil.rmtree(root, ignore_errors=True)
+    os.replace(tmp, root)
+
+download = instrument.source(download)
+
+'''
+loadWar(kind, start_year, end_year)
+    INPUT
+kind: 'bat' or 'pitch'
+start_year: beginning of year range to pull data
+end_year: end of year range to pull data
+    OUTPUT
+DataFrame of bWAR rows for the seasons (key_mlbam, Season, Team, ...), read from the requested partitions only
+'''
+@instrument.stage
+def loadWar(kind, start_year, end_year):
+    with locks[kind]:
+        if not isFresh(kind, start_year, end_year):
+            download(kind)
+    war = store.read(warDir(), kind, seasons=range(start_year, end_year+1))
+    return war.astype({'key_mlbam':'Int32'})
@@ -0,0 +1,289 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import atexit
+import argparse
+import datetime
+import threading
+import functools
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# cache_dir: where cached source frames live (override with the SAC_CACHE_DIR environment variable)
+cache_dir = os.environ.get('SAC_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'sac_baseball'))
+
+# ttl: seconds before an entry for the in-progress season is re-downloaded
+# reference_ttl: same, for calls that are not tied to a season (Chadwick register, Lahman tables, full bWAR files)
+ttl = 12 * 60 * 60
+reference_ttl = 7 * 24 * 60 * 60
+
+# max_bytes: size bound for the whole cache, least recently used entries are evicted past it
+max_bytes = 2 * 1024**3
+
+# enabled: set to False to bypass the cache entirely (every call goes to the network)
+enabled = True
+
+lock = threading.RLock()
+
+# touched: access times of cache hits not yet written to the index (flushed by write, prune and at exit)
+touched = {}
+
+# index_cache: (mtime, index) of the last index.json read by read(), so hits do not re-parse an unchanged index
+index_cache = (None, {})
+
+'''
+currentSeason()
+    OUTPUT
+the in-progress (or most recent) season; every earlier season is treated as finished and immutable
+'''
+def currentSeason():
+    return datetime.date.today().year
+
+def indexPath():
+    return os.path.join(cache_dir, 'index.json')
+
+def loadIndex():
+    try:
+        with open(indexPath()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def saveIndex(index):
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = indexPath() + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp, indexPath())
+
+'''
+funcName(func)
+    OUTPUT
+dotted name used to key and report cache entries (e.g. pybaseball.lahman.people)
+'''
+def funcName(func):
+    return '%s.%s' % (getattr(func, '__module__', None) or '', getattr(func, '__qualname__', repr(func)))
+
+'''
+cacheKey(name, args, kwargs)
+    OUTPUT
+stable hex digest of the function name and its arguments
+'''
+def cacheKey(name, args, kwargs):
+    raw = json.dumps([name, [repr(a) for a in args], sorted((k, repr(v)) for k, v in kwargs.items())])
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+'''
+seasonOf(args, kwargs, spec)
+    INPUT
+spec: None (call is not tied to a season), a keyword name (e.g. 'year') or a positional index (e.g. 1 for end_year)
+    OUTPUT
+season covered by the call, or None
+'''
+def seasonOf(args, kwargs, spec):
+    if spec is None:
+        return None
+    if isinstance(spec, str):
+        season = kwargs.get(spec)
+    elif args:
+        season = args[min(spec, len(args) - 1)]
+    else:
+        season = None
+    return int(season) if season is not None else None
+
+'''
+isFresh(entry, now)
+    OUTPUT
+True if the entry can be served: entries fetched after their season ended never expire, anything else (the current
+season, a season fetched while in progress, unscoped calls) expires on a TTL
+    NOTES
+A call over a range of seasons is one entry tagged with its last season, so the whole range is re-fetched when that
+season expires
+'''
+def isFresh(entry, now=None):
+    now = time.time() if now is None else now
+    season = entry.get('season')
+    if season is not None and season < currentSeason() and datetime.date.fromtimestamp(entry['created']).year > season:
+        return True
+    limit = reference_ttl if season is None else ttl
+    return now - entry['created'] < limit
+
+def entryPath(key):
+    return os.path.join(cache_dir, key[:2], key + '.parquet')
+
+'''
+read(key)
+    OUTPUT
+cached DataFrame for key, or None if missing/expired
+    NOTES
+Hits only record their access time in memory (see touched); the index file is not rewritten
+'''
+def read(key):
+    global index_cache
+    try:
+        mtime = os.stat(indexPath()).st_mtime_ns
+    except OSError:
+        return None
+    with lock:
+        if index_cache[0] != mtime:
+            index_cache = (mtime, loadIndex())
+        entry = index_cache[1].get(key)
+        if entry is None or not isFresh(entry) or not os.path.exists(entryPath(key)):
+            return None
+        touched[key] = time.time()
+    return pq.read_table(entryPath(key)).to_pandas()
+
+'''
+flushAccess(index)
+    NOTES
+Copies pending access times into index (in place); call with lock held before saving the index
+'''
+def flushAccess(index):
+    for key, accessed in touched.items():
+        if key in index:
+            index[key]['accessed'] = max(index[key]['accessed'], accessed)
+    touched.clear()
+
+@atexit.register
+def flush():
+    with lock:
+        if touched:
+            index = loadIndex()
+            flushAccess(index)
+            saveIndex(index)
+
+'''
+write(key, df, name, args, kwargs, season)
+    NOTES
+Stores df as Parquet with the call description in the file's schema metadata, then enforces max_bytes.
+Frames pyarrow cannot represent (mixed-type object columns) are silently left uncached.
+'''
+def write(key, df, name, args, kwargs, season):
+    meta = {'func': name, 'args': [repr(a) for a in args], 'kwargs': {k: repr(v) for k, v in kwargs.items()},
+            'season': season, 'created': time.time()}
+    try:
+        table = pa.Table.from_pandas(df)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return
+    table = table.replace_schema_metadata(dict(table.schema.metadata or {}, sac_cache=json.dumps(meta)))
+    path = entryPath(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = '%s.%d.tmp' % (path, threading.get_ident())
+    pq.write_table(table, tmp)
+    os.replace(tmp, path)
+    with lock:
+        index = loadIndex()
+        flushAccess(index)
+        index[key] = dict(meta, accessed=meta['created'], bytes=os.path.getsize(path))
+        evict(index, max_bytes)
+        saveIndex(index)
+
+'''
+evict(index, limit)
+    NOTES
+Removes least recently accessed entries (in place) until the cache fits in limit bytes
+'''
+def evict(index, limit):
+    total = sum(entry['bytes'] for entry in index.values())
+    for key in sorted(index, key=lambda k: index[k]['accessed']):
+        if total <= limit:
+            break
+        total -= index[key]['bytes']
+        remove(index, key)
+
+def remove(index, key):
+    index.pop(key, None)
+    try:
+        os.remove(entryPath(key))
+    except OSError:
+        pass
+
+'''
+cached(func, season)
+    INPUT
+func: source function returning a DataFrame (e.g. pyb.batting_stats)
+season: which argument holds the season the call covers (see seasonOf)
+    OUTPUT
+wrapped function that serves results from the on-disk cache when fresh
+'''
+def cached(func, season=None):
+    name = funcName(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not enabled:
+            return func(*args, **kwargs)
+        key = cacheKey(name, args, kwargs)
+        df = read(key)
+        if df is not None:
+            return df
+        df = func(*args, **kwargs)
+        if isinstance(df, pd.DataFrame):
+            write(key, df, name, args, kwargs, seasonOf(args, kwargs, season))
+        return df
+    return wrapper
+
+'''
+prune(limit, expired, func)
+    INPUT
+limit: evict least recently used entries until the cache fits in this many bytes (None to skip)
+expired: drop entries whose TTL has run out
+func: drop every entry for this function name (substring match)
+    OUTPUT
+number of entries removed
+'''
+def prune(limit=None, expired=False, func=None):
+    with lock:
+        index = loadIndex()
+        flushAccess(index)
+        before = len(index)
+        for key in list(index):
+            if (expired and not isFresh(index[key])) or (func is not None and func in index[key]['func']):
+                remove(index, key)
+        if limit is not None:
+            evict(index, limit)
+        saveIndex(index)
+        return before - len(index)
+
+'''
+summary()
+    OUTPUT
+DataFrame with entry count, bytes and season range per cached function
+'''
+def summary():
+    index = loadIndex()
+    if not index:
+        return pd.DataFrame(columns=['func', 'entries', 'bytes', 'first_season', 'last_season', 'expired'])
+    entries = pd.DataFrame(index.values())
+    entries['expired'] = [not isFresh(entry) for entry in index.values()]
+    return entries.groupby('func').agg(entries=('bytes', 'size'),
+                                       bytes=('bytes', 'sum'),
+                                       first_season=('season', 'min'),
+                                       last_season=('season', 'max'),
+                                       expired=('expired', 'sum')).reset_index()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect and prune the pybaseball source cache (%s)' % cache_dir)
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    sub.add_parser('info', help='entries and size per source function')
+    pr = sub.add_parser('prune', help='remove entries')
+    pr.add_argument('--max-bytes', type=int, help='evict least recently used entries down to this size')
+    pr.add_argument('--expired', action='store_true', help='remove entries past their TTL')
+    pr.add_argument('--func', help='remove every entry whose function name contains this string')
+    sub.add_parser('clear', help='remove every entry')
+    args = parser.parse_args(argv)
+
+    if args.cmd == 'info':
+        table = summary()
+        print(table.to_string(index=False))
+        print('total: %d entries, %.1f MB (limit %.1f MB)' % (table['entries'].sum(), table['bytes'].sum() / 1024**2, max_bytes / 1024**2))
+    elif args.cmd == 'prune':
+        print('removed %d entries' % prune(args.max_bytes, args.expired, args.func))
+    else:
+        print('removed %d entries' % prune(limit=0))
+
+if __name__ == '__main__':
+    sys.exit(main())
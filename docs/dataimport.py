@@ -3,10 +3,19 @@ import pandas as pd
 import numpy as np
 import math
 import collections
+import threading
 import matplotlib
 import matplotlib.pyplot as pp
 import geopy as gp
 from geopy import geocoders
+import fetch
+import cache
+import pipeline
+import store
+import schema
+import bwar
+import replay
+import instrument
 
 # fgteams: a dict with how FanGraphs filtering maps teams, can eventually be converted into a function that automatically maps these based on year.
 # Will essentially be the same order from 1998 on, but different values for teams
@@ -51,6 +60,15 @@ pitchf_cols = ['SB', 'rSB']
 drop_bio = ['deathYear','deathMonth','deathDay','deathCountry','deathState','deathCity','nameFirst','nameLast','nameGiven',
             'debut','finalGame','retroID','bbrefID']
 
+# every column list above has a compact dtype in schema.py, applied as frames come in from the sources
+schema.check(hitting_cols, schema.hitting)
+schema.check(pitching_cols, schema.pitching)
+schema.check(fielding_cols, schema.fielding)
+schema.check(infield_cols, schema.infield)
+schema.check(outfield_cols, schema.outfield)
+schema.check(catching_cols, schema.catching)
+schema.check(pitchf_cols, schema.pitchf)
+
 month = {
     'Mar':'03',
     'Apr':'04',
@@ -75,79 +93,229 @@ pos_dict = {
 }
 
 '''
-genID(df)
+source(func, season)
+    INPUT
+func: pybaseball function
+season: which argument holds the season a call covers (see cache.seasonOf)
+    OUTPUT
+func behind the on-disk cache (cache.py), under the record/replay layer (replay.py), recorded by instrument.py
+'''
+def source(func, season=None):
+    return instrument.source(replay.recorded(cache.cached(func, season)))
+
+# source functions: every pybaseball call below goes through source(), so finished seasons are served from disk and
+# benchmarks can replay recorded responses
+chadwick_register = source(pyb.chadwick_register)
+people = source(pyb.lahman.people)
+teams_core = source(pyb.lahman.teams_core)
+teams_upstream = source(pyb.lahman.teams_upstream)
+batting_stats = source(pyb.batting_stats, 1)
+pitching_stats = source(pyb.pitching_stats, 1)
+fielding_stats = source(pyb.fielding_stats, 1)
+team_batting = source(pyb.team_batting, 1)
+team_pitching = source(pyb.team_pitching, 1)
+schedule_and_record = source(pyb.schedule_and_record, 0)
+statcast_batter_exitvelo_barrels = source(pyb.statcast_batter_exitvelo_barrels, 'year')
+statcast_batter_expected_stats = source(pyb.statcast_batter_expected_stats, 'year')
+statcast_pitcher_exitvelo_barrels = source(pyb.statcast_pitcher_exitvelo_barrels, 'year')
+statcast_pitcher_expected_stats = source(pyb.statcast_pitcher_expected_stats, 'year')
+statcast_pitcher_pitch_arsenal = source(pyb.statcast_pitcher_pitch_arsenal, 'year')
+
+# statcast_batting/statcast_pitching: Savant leaderboards (function, keyword arguments) pulled for every season and
+# merged on key_mlbam/Season; the first one decides which player-seasons are kept
+statcast_batting = [(statcast_batter_exitvelo_barrels, {'minBBE':1}),
+                    (statcast_batter_expected_stats, {'minPA':10})]
+statcast_pitching = [(statcast_pitcher_exitvelo_barrels, {'minBBE':50}),
+                     (statcast_pitcher_expected_stats, {'minPA':50}),
+                     (statcast_pitcher_pitch_arsenal, {'minP':200, 'arsenal_type':'avg_speed'}),
+                     (statcast_pitcher_pitch_arsenal, {'minP':200, 'arsenal_type':'avg_spin'})]
+
+'''
+loadRegister()
+    OUTPUT
+Chadwick register trimmed to players with an MLBAM ID and the ID/debut columns the pipeline reads
+'''
+def loadRegister():
+    reg = chadwick_register()[['key_mlbam', 'key_fangraphs', 'key_retro', 'key_bbref', 'mlb_played_first', 'mlb_played_last']]
+    reg = reg[reg['key_mlbam'].fillna(-1) > 0].fillna({'key_fangraphs':-1})
+    return reg.astype({'key_mlbam':'int32',
+                       'key_fangraphs':'int32',
+                       'mlb_played_first':'Int16',
+                       'mlb_played_last':'Int16'}).rename(columns={'mlb_played_first':'debut', 'mlb_played_last':'recent_season'})
+
+'''
+loadPeople()
+    OUTPUT
+Lahman people table without drop_bio columns (index: RangeIndex, playerID renamed to key_bbref)
+'''
+def loadPeople():
+    bio = people().drop(columns=drop_bio).rename(columns={'playerID':'key_bbref'}).reset_index(drop=True)
+    return bio.astype({col:'category' for col in ['birthCountry', 'birthState', 'birthCity', 'bats', 'throws'] if col in bio.columns})
+
+'''
+loadTeams()
+    OUTPUT
+Lahman core teams table, only the columns gameLogs and teamDepot read
+'''
+def loadTeams():
+    teams = teams_core()[['yearID', 'teamIDBR', 'name', 'divID', 'Rank', 'W', 'L', 'BPF', 'PPF']]
+    return teams.astype({'yearID':'int16', 'teamIDBR':'category', 'name':'category', 'divID':'category',
+                         'Rank':'int8', 'W':'int16', 'L':'int16', 'BPF':'int16', 'PPF':'int16'})
+
+'''
+loadTeamsUpstream()
+    OUTPUT
+Lahman upstream teams table, only the park factor columns teamBatting reads
+'''
+def loadTeamsUpstream():
+    return teams_upstream()[['teamIDBR', 'BPF', 'yearID']].astype({'BPF':'int16', 'yearID':'int16'})
+
+'''
+Session()
+    NOTES
+Holds the reference tables (Chadwick register, Lahman people/teams) for one run. Each table is loaded the first
+time it is used and then shared by every gen* function, so a master() run parses each source once.
+'''
+class Session:
+    loaders = {'register': loadRegister,
+               'people': loadPeople,
+               'teams': loadTeams,
+               'teams_upstream': loadTeamsUpstream}
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.locks = {}
+        self.tables = {}
+
+    def __getattr__(self, name):
+        if name not in Session.loaders:
+            raise AttributeError(name)
+        # one lock per table: concurrent pipeline stages wait for a table being loaded, not for unrelated ones
+        with self.lock:
+            table_lock = self.locks.setdefault(name, threading.Lock())
+        with table_lock:
+            if name not in self.tables:
+                self.tables[name] = Session.loaders[name]()
+            return self.tables[name]
+
+'''
+genID(df, session)
     INPUT
 df: FanGraphs DataFrame (batting or pitching)
+session: Session holding the Chadwick register
     OUTPUT
 DataFrame of ID's of players in df
 '''
-def genID(df):
-    return df.reset_index()[['key_mlbam', 'Name', 'Team']].drop_duplicates(subset=['key_mlbam']).merge(pyb.chadwick_register()
-                                                                                                .rename(columns={'playerID':'key_bbref', 'mlb_played_first':'debut', 'mlb_played_last':'recent_season'})
-                                                                                                .drop(columns=['name_last', 'name_first']), on='key_mlbam', how='left')
+@instrument.stage
+def genID(df, session=None):
+    session = Session() if session is None else session
+    return df.reset_index()[['key_mlbam', 'Name', 'Team']].drop_duplicates(subset=['key_mlbam']).merge(session.register, on='key_mlbam', how='left')
     
 '''
-genBio(IDdf)
+genBio(IDdf, session)
     INPUT
 IDdf: ID DataFrame
+session: Session holding the Lahman people table
     OUTPUT
 DataFrame with biographical information about players
 '''
-def genBio(IDdf):
-    return IDdf.merge(pyb.lahman.people().reset_index()
-                                         .rename(columns={'playerID':'key_bbref'})
-                                         .drop(columns=drop_bio), on='key_bbref', how='left').drop(columns=['index','key_fangraphs', 'key_retro', 'key_bbref'])
+@instrument.stage
+def genBio(IDdf, session=None):
+    session = Session() if session is None else session
+    return IDdf.merge(session.people, on='key_bbref', how='left').drop(columns=['key_fangraphs', 'key_retro', 'key_bbref'])
+
+# game_key: identifies a game in the schedule (Game is the doubleheader number, 0 for single games)
+game_key = ['Date', 'Home', 'Away', 'Game']
 
 '''
-gameLogs(start_year, end_year)
+parseGameLogs(gl)
+    INPUT
+gl: raw schedule_and_record rows for one or more seasons, with a Season column
+    OUTPUT
+DataFrame with one row per played game (Attendance present), keyed by game_key: Date as datetime64, Day/Month strings
+and Time in minutes; malformed dates or times come out as NaT/NA instead of raising
+    NOTES
+Every game is listed on both clubs' pages; only the home club's row is kept, before any string is parsed
+'''
+@instrument.stage
+def parseGameLogs(gl):
+    # away rows are marked '@' on the page ('Away' in some pybaseball versions)
+    gl = gl[~gl['Home_Away'].isin(['@', 'Away'])].dropna(subset=['Attendance']).reset_index(drop=True)
+    gl['R_tot'] = gl['R'] + gl['RA']
+    gl['R_diff'] = (gl['R'] - gl['RA']).abs()
+    # a season has only a few hundred distinct date and time strings, so parse those once and broadcast back by code
+    # (missing values get a code of their own and parse to NaT/NA; the default -1 sentinel would wrap around in take)
+    codes, dates = pd.factorize(gl['Date'].astype(str), use_na_sentinel=False)
+    date = pd.Series(dates).str.extract(r',\s*(?P<Month>[A-Za-z]{3})[a-z]*\s+(?P<Day>\d{1,2})(?:\s*\((?P<Game>\d)\))?')
+    date['Day'] = date['Day'].str.zfill(2)
+    date['Month'] = date['Month'].map(month)
+    date['Game'] = pd.to_numeric(date['Game']).fillna(0).astype('int8')
+    date['month'] = pd.to_numeric(date['Month'])
+    date['day'] = pd.to_numeric(date['Day'])
+    date = date.take(codes).reset_index(drop=True)
+    gl[['Day', 'Month', 'Game']] = date[['Day', 'Month', 'Game']]
+    gl['Date'] = pd.to_datetime(pd.DataFrame({'year': gl['Season'], 'month': date['month'], 'day': date['day']}), errors='coerce')
+    codes, times = pd.factorize(gl['Time'].astype(str), use_na_sentinel=False)
+    time = pd.Series(times).str.extract(r'^\s*(\d{1,2}):(\d{2})').apply(pd.to_numeric)
+    gl['Time'] = (time[0] * 60 + time[1]).astype('Int16').take(codes).reset_index(drop=True)
+    gl = gl.rename(columns={'Tm':'Home', 'Opp':'Away'})
+    return gl[['Date','Game','Day','Month','Season','Home','Away','Time','D/N','Attendance']]
+
+'''
+teamGames(gl, teams)
+    INPUT
+gl: schedule from gameLogs (one row per game)
+teams: optional iterable of teams to keep
+    OUTPUT
+DataFrame with one row per team per game (Tm/Opp, Home_Away 'Home' or 'Away'), built from the schedule without
+re-parsing anything; game_key columns are kept so rows join back to the schedule
+'''
+def teamGames(gl, teams=None):
+    home = gl.assign(Tm=gl['Home'], Opp=gl['Away'], Home_Away='Home')
+    away = gl.assign(Tm=gl['Away'], Opp=gl['Home'], Home_Away='Away')
+    if teams is not None:
+        home, away = home[home['Tm'].isin(teams)], away[away['Tm'].isin(teams)]
+    out = pd.concat([home, away], ignore_index=True).sort_values(['Date', 'Game', 'Tm'], kind='stable')
+    return out[['Date','Game','Day','Month','Season','Tm','Opp','Home_Away','Home','Away','Time','D/N','Attendance']].reset_index(drop=True)
+
+'''
+gameLogs(start_year, end_year, session, since)
     INPUT
 start_year: beginning of year range to pull data
 end_year: end of year range to pull data
+session: Session holding the Lahman teams table
+since: if given, only games played on or after this date are kept
     OUTPUT
-DataFrame with gamelogs for a given timeframe
+DataFrame with one row per game for a given timeframe, keyed by game_key (see parseGameLogs; teamGames gives the
+per-team view)
 '''
-def gameLogs(start_year, end_year):
+@instrument.stage
+def gameLogs(start_year, end_year, session=None, since=None):
+    session = Session() if session is None else session
     years = []
-    dict = {
-    'Mar':'03',
-    'Apr':'04',
-    'May':'05',
-    'Jun':'06',
-    'Jul':'07',
-    'Aug':'08',
-    'Sep':'09',
-    'Oct':'10'
-    }
-    repot = pyb.lahman.teams_core().groupby('yearID')
+    repot = session.teams.groupby('yearID')
     for year in range(start_year,end_year+1):
         if year > 2022:
-            temp = pd.concat([pyb.schedule_and_record(year,fgteams[team]) for team in fgteams])   
+            temp = pd.concat([schedule_and_record(year,fgteams[team]) for team in fgteams])   
         else:
-            temp = pd.concat([pyb.schedule_and_record(year,team) for team in repot.get_group(year)['teamIDBR']])
+            temp = pd.concat([schedule_and_record(year,team) for team in repot.get_group(year)['teamIDBR']])
         temp['Season'] = year
         years.append(temp)
-    gl = pd.concat(years)
-    gl['R_tot'] = gl['R'] + gl['RA']
-    gl['R_diff'] = gl.apply(lambda x: x['R']-x['RA'] if x['R']>x['RA'] else x['RA']-x['R'],axis=1)
-    gl['Date_split'] = gl['Date'].apply(lambda x: x.split(',')[1])
-    gl['Day'] = gl['Date_split'].apply(lambda x: x.split(' ')[2])
-    gl['Day'] = gl['Day'].apply(lambda x: '0'+x if int(x)<10 else x)
-    gl['Month'] = gl['Date_split'].apply(lambda x: x.split(' ')[1])
-    gl['Month'] = gl['Month'].map(dict)
-    gl.dropna(subset=['Attendance'], inplace=True)
-    gl['Time'] = gl['Time'].apply(lambda x: int(x.split(':')[0])*60 + int(x.split(':')[1]))
-    return gl[['Day','Month','Season','Tm','Opp','Time','D/N','Attendance']]
+    gl = parseGameLogs(pd.concat(years))
+    return gl if since is None or pd.isna(since) else gl[gl['Date'] >= pd.Timestamp(since)]
 
 '''
-teamDepot(start_year, end_year)
+teamDepot(start_year, end_year, session)
 '''
-def teamDepot(start_year, end_year):
+@instrument.stage
+def teamDepot(start_year, end_year, session=None):
+    session = Session() if session is None else session
     div={
         'E':'EAST',
         'C':'CENTRAL',
         'W':'WEST'
     }
-    lmn = pyb.lahman.teams_core().groupby('yearID')
+    lmn = session.teams.groupby('yearID')
     if end_year > 2022:
         years = []
         if start_year >= 2022:
@@ -171,29 +339,57 @@ def teamDepot(start_year, end_year):
                                                                                                   'divID':'Division'})
 
 '''
-fgBatting(start_year, end_year)
+fgBatting(start_year, end_year, session)
     INPUT
 start_year: beginning of year range to pull data
 end_year: end of year range to pull data
+session: Session holding the Chadwick register
     OUTPUT
 fgdf: DF with FanGraphs data for given timeframe (index: key_mlbam)
 '''
-def fgBatting(start_year, end_year):
+@instrument.stage
+def fgBatting(start_year, end_year, session=None):
+    session = Session() if session is None else session
     team_dfs = []
-
-    for team in fgteams:
-        fg_temp = pyb.batting_stats(start_year, 
-                                           end_year, 
-                                           team=team, 
-                                           qual=10, 
-                                           split_seasons = True)[['IDfg', 'Name', 'Age', 'G', 'Season'] + 
-                                                                  [col for col in hitting_cols]]
+    frames = fetch.fetchAll(fetch.teamCalls(batting_stats, fgteams, start_year, end_year, qual=10, split_seasons=True),
+                            host='www.fangraphs.com')
+    for team, fg_temp in zip(fgteams, frames):
+        fg_temp = fg_temp[['IDfg', 'Name', 'Age', 'G', 'Season'] + [col for col in hitting_cols]]
         fg_temp['Team'] = fgteams[team]
         team_dfs.append(fg_temp)
-    fgdf = pd.concat(team_dfs).rename(columns={"IDfg":"key_fangraphs"}).merge(pyb.chadwick_register()[['key_fangraphs', 'key_mlbam']])
-    fgdf = fgdf[['key_mlbam','Name', 'Age', 'Team','G', 'Season'] + [col for col in hitting_cols]].set_index('key_mlbam')
+    fgdf = pd.concat(team_dfs).rename(columns={"IDfg":"key_fangraphs"}).merge(session.register[['key_fangraphs', 'key_mlbam']])
+    fgdf = fgdf[['key_mlbam','Name', 'Age', 'Team','G', 'Season'] + [col for col in hitting_cols]]
+    fgdf = schema.enforce(fgdf, {**schema.id_cols, **schema.hitting}, 'fgBatting').set_index('key_mlbam')
     return fgdf
 
+'''
+statcast(endpoints, start_year, end_year)
+    INPUT
+endpoints: list of (leaderboard function, keyword arguments), e.g. statcast_batting
+start_year: beginning of year range to pull data
+end_year: end of year range to pull data
+    OUTPUT
+DataFrame with one row per player-season of the first leaderboard and the columns of all of them
+    NOTES
+Every (leaderboard, season) pair is fetched concurrently and tagged with its season, then each leaderboard is stacked
+across seasons and all of them are joined once on (key_mlbam, Season) instead of merging per season.
+'''
+@instrument.stage
+def statcast(endpoints, start_year, end_year):
+    years = range(start_year, end_year+1)
+    calls = [(func, (), dict(kwargs, year=year)) for func, kwargs in endpoints for year in years]
+    frames = iter(fetch.fetchAll(calls, host='baseballsavant.mlb.com'))
+    boards = []
+    for _ in endpoints:
+        board = pd.concat([next(frames).assign(Season=year) for year in years])
+        board = board.rename(columns={'player_id':'key_mlbam', 'pitcher':'key_mlbam'}).drop(columns=['last_name', 'first_name', 'year'], errors='ignore')
+        boards.append(board.drop_duplicates(subset=['key_mlbam', 'Season']).set_index(['key_mlbam', 'Season']))
+    seen = set(boards[0].columns)
+    for i in range(1, len(boards)):
+        boards[i] = boards[i][[col for col in boards[i].columns if col not in seen]]
+        seen.update(boards[i].columns)
+    return boards[0].join(boards[1:], how='left').reset_index()
+
 '''
 statBatting(start_year, end_year)
     INPUT
@@ -202,15 +398,9 @@ end_year: end of year range to pull data
     OUTPUT
 statdf: DataFrame with Statcast data for given timeframe
 '''
+@instrument.stage
 def statBatting(start_year, end_year):
-    years = []
-    for year in range(start_year,end_year+1):
-        stat_temp = pyb.statcast_batter_exitvelo_barrels(year=year, minBBE=1).rename(columns={"player_id":"key_mlbam"}).drop(columns=["last_name","first_name"]).merge(pyb.statcast_batter_expected_stats(year=year, minPA=10)
-                                                                                                                                                                                                                            .rename(columns={"player_id":"key_mlbam"})
-                                                                                                                                                                                                                            .drop(columns=["last_name","first_name"]), on="key_mlbam", how="left")
-        stat_temp['Season'] = year
-        years.append(stat_temp)
-    statdf = pd.concat(years)
+    statdf = schema.enforce(statcast(statcast_batting, start_year, end_year), schema.statcast, 'statBatting', downcast=True)
     return statdf
 
 '''
@@ -219,48 +409,48 @@ bwarBatting(start_year, end_year)
 start_year: beginning of year range to pull data
 end_year: end of year range to pull data
     OUTPUT
-DataFrame with bWAR data (from BaseballReference) for a given timeframe
+DataFrame with bWAR data (from BaseballReference) for a given timeframe, read from the season-partitioned copy in bwar.py
 '''
+@instrument.stage
 def bwarBatting(start_year, end_year):
-    bwar = pyb.bwar_bat(return_all=True).rename(columns={"mlb_ID":"key_mlbam"}).groupby(['year_ID'])
-    return pd.concat([bwar.get_group(year) for year in range(start_year,end_year+1)]).drop(columns=['name_common', 'player_ID', 'age', 'lg_ID']).rename(columns={'year_ID':'Season',
-                                                                                                                                                                 'team_ID':'Team',
-                                                                                                                                                                 'lg_ID':'League'})
+    return bwar.loadWar('bat', start_year, end_year)
 
 '''
-teamBatting(start_year, end_year)
+teamBatting(start_year, end_year, session)
     INPUT
 start_year: beginning of year range to pull data
 end_year: end of year range to pull data
+session: Session holding the Lahman upstream teams table
     OUTPUT
 DataFrame with FanGraphs team batting data
 '''
-def teamBatting(start_year, end_year):
-    return pd.concat([pyb.team_batting(year)[['teamIDfg', 'Team', 'Season'] + [col for col in hitting_cols]].merge(pyb.lahman.teams_upstream()[['teamIDBR', 'BPF', 'yearID']].rename(columns={'teamIDBR':'Team','yearID':'Season'}),on=['Team','Season'], how='left').merge(pyb.team_pitching(year, split_seasons=True)[['Season', 'Team', 'W', 'L']],  on=['Team','Season']) for year in range(start_year, end_year+1)]).reset_index()
+@instrument.stage
+def teamBatting(start_year, end_year, session=None):
+    session = Session() if session is None else session
+    return pd.concat([team_batting(year)[['teamIDfg', 'Team', 'Season'] + [col for col in hitting_cols]].merge(session.teams_upstream.rename(columns={'teamIDBR':'Team','yearID':'Season'}),on=['Team','Season'], how='left').merge(team_pitching(year, split_seasons=True)[['Season', 'Team', 'W', 'L']],  on=['Team','Season']) for year in range(start_year, end_year+1)]).reset_index()
 
 '''
-fgPitching(start_year, end_year)
+fgPitching(start_year, end_year, session)
     INPUT
 start_year: beginning of year range to pull data
 end_year: end of year range to pull data
+session: Session holding the Chadwick register
     OUTPUT
 fgdf: DF with FanGraphs data for given timeframe (index: key_mlbam)
 '''
-def fgPitching(start_year, end_year):
+@instrument.stage
+def fgPitching(start_year, end_year, session=None):
+    session = Session() if session is None else session
     team_dfs = []
-
-    for team in fgteams:
-        fg_temp = pyb.pitching_stats(start_year, 
-                                           end_year, 
-                                           team=team, 
-                                           qual=10, 
-                                           split_seasons = True)[['IDfg', 'Name', 'Age', 'Season', 'G', 'GS'] + 
-                                                                  [col for col in pitching_cols]]
+    frames = fetch.fetchAll(fetch.teamCalls(pitching_stats, fgteams, start_year, end_year, qual=10, split_seasons=True),
+                            host='www.fangraphs.com')
+    for team, fg_temp in zip(fgteams, frames):
+        fg_temp = fg_temp[['IDfg', 'Name', 'Age', 'Season', 'G', 'GS'] + [col for col in pitching_cols]]
         fg_temp['Team'] = fgteams[team]
         team_dfs.append(fg_temp)
-    fgdf = pd.concat(team_dfs).rename(columns={"IDfg":"key_fangraphs"}).merge(pyb.chadwick_register()[['key_fangraphs', 'key_mlbam']])
-    fgdf = fgdf[['key_mlbam','Name', 'Age', 'Team', 'Season', 'G', 'GS'] + [col for col in pitching_cols]].set_index('key_mlbam')
-    
+    fgdf = pd.concat(team_dfs).rename(columns={"IDfg":"key_fangraphs"}).merge(session.register[['key_fangraphs', 'key_mlbam']])
+    fgdf = fgdf[['key_mlbam','Name', 'Age', 'Team', 'Season', 'G', 'GS'] + [col for col in pitching_cols]]
+    fgdf = schema.enforce(fgdf, {**schema.id_cols, **schema.pitching}, 'fgPitching').set_index('key_mlbam')
     return fgdf
 
 '''
@@ -271,19 +461,10 @@ end_year: end of year range to pull data
     OUTPUT
 statdf: DataFrame with Statcast data for given timeframe
 '''
+@instrument.stage
 def statPitching(start_year, end_year):
-    return pd.concat([pyb.statcast_pitcher_exitvelo_barrels(year=year,minBBE=50)
-                         .merge(pyb.statcast_pitcher_expected_stats(year=year, minPA=50)
-                                   .drop(columns=['last_name','first_name']),on='player_id',how='left')
-                         .merge(pyb.statcast_pitcher_pitch_arsenal(year=2022,minP=200,arsenal_type='avg_speed')
-                                   .drop(columns=['last_name','first_name'])
-                                   .rename(columns={'pitcher':'player_id'}),on='player_id',how='left')
-                         .merge(pyb.statcast_pitcher_pitch_arsenal(year=year,minP=200,arsenal_type='avg_spin')
-                                   .drop(columns=['last_name','first_name'])
-                                   .rename(columns={'pitcher':'player_id'}),on='player_id',how='left')
-                         .drop(columns=['last_name','first_name'])
-                         .rename(columns={'player_id':'key_mlbam',
-                                          'year':'Season'}) for year in range(start_year,end_year+1)])
+    statdf = schema.enforce(statcast(statcast_pitching, start_year, end_year), schema.statcast, 'statPitching', downcast=True)
+    return statdf
 
 '''
 bWARPitching(start_year, end_year)
@@ -291,13 +472,12 @@ bWARPitching(start_year, end_year)
 start_year: beginning of year range to pull data
 end_year: end of year range to pull data
     OUTPUT
-DataFrame with bWAR data (from BaseballReference) for a given timeframe
+DataFrame with bWAR data (from BaseballReference) for a given timeframe, read from the season-partitioned copy in bwar.py
 '''
+@instrument.stage
 def bwarPitching(start_year, end_year):
-    bwar = pyb.bwar_pitch(return_all=True).rename(columns={"mlb_ID":"key_mlbam"}).groupby(['year_ID'])
-    return pd.concat([bwar.get_group(year) for year in range(start_year,end_year+1)]).drop(columns=['name_common', 'player_ID', 'age', 'lg_ID']).rename(columns={'year_ID':'Season',
-                                                                                                                                                                 'team_ID':'Team',
-                                                                                                                                                                 'lg_ID':'League'})
+    return bwar.loadWar('pitch', start_year, end_year)
+
 '''
 teamPitching(start_year, end_year)
     INPUT
@@ -306,14 +486,38 @@ end_year: end of year range to pull data
     OUTPUT
 DataFrame with FanGraphs team batting data
 '''
+@instrument.stage
 def teamPitching(start_year, end_year):
-    return pyb.team_pitching(start_year, end_year, ind=1)
+    return team_pitching(start_year, end_year, ind=1)
+
+'''
+joinPlayers(fg, stat, bwar, session)
+    INPUT
+fg: FanGraphs player DataFrame (fgBatting/fgPitching, index: key_mlbam)
+stat: Statcast DataFrame for the same timeframe (statBatting/statPitching)
+bwar: bWAR DataFrame for the same timeframe (bwarBatting/bwarPitching)
+session: Session shared by the run
+    OUTPUT
+stat: Statcast data for the players in fg
+bwar: bWAR data for the player-seasons in fg
+bio: DataFrame of biographical data for the players in fg
+df_id: DataFrame of player ID's for the players in fg
+'''
+@instrument.stage
+def joinPlayers(fg, stat, bwar, session=None):
+    session = Session() if session is None else session
+    df_id = genID(fg, session)
+    bio = genBio(df_id, session)
+    stat = fg.reset_index()[['key_mlbam','Season']].merge(stat, on=['key_mlbam', 'Season'], how='left').drop_duplicates()
+    bwar = fg.reset_index()[['key_mlbam','Season','Team']].merge(bwar, on=['key_mlbam','Season','Team'],how='left')
+    return [stat, bwar, bio, df_id]
 
 '''
-genBatting(start_year, end_year)
+genBatting(start_year, end_year, session)
     INPUT
 start_year: beginning of year range to pull data
 end_year: end of year range to pull data
+session: Session shared by the run (a new one is created if omitted)
     OUTPUT
 fg: DataFrame of Fangraphs batting data from a given timeframe
 stat: DataFrame of Statcast batting data from a given timeframe
@@ -322,20 +526,20 @@ team: DataFrame of team Fangraphs batting data from a given timeframe
 bio: DataFrame of biographical data from a given timeframe
 df_id: DataFrame of player ID's from a given timeframe
 '''
-def genBatting(start_year, end_year):
-    fg = fgBatting(start_year,end_year)
-    df_id = genID(fg)
-    bio = genBio(df_id)
-    stat = fg.reset_index()[['key_mlbam','Season']].merge(statBatting(start_year, end_year), on=['key_mlbam', 'Season'], how='left').drop_duplicates()
-    bwar = fg.reset_index()[['key_mlbam','Season','Team']].merge(bwarBatting(start_year, end_year), on=['key_mlbam','Season','Team'],how='left')
-    team = teamBatting(start_year, end_year)
+@instrument.stage
+def genBatting(start_year, end_year, session=None):
+    session = Session() if session is None else session
+    fg = fgBatting(start_year,end_year,session)
+    [stat, bwar, bio, df_id] = joinPlayers(fg, statBatting(start_year, end_year), bwarBatting(start_year, end_year), session)
+    team = teamBatting(start_year, end_year, session)
     return [fg, stat, bwar, team, bio, df_id]
 
 '''
-genPitching(start_year, end_year)
+genPitching(start_year, end_year, session)
     INPUT
 start_year: beginning of year range to pull data
 end_year: end of year range to pull data
+session: Session shared by the run (a new one is created if omitted)
     OUTPUT
 fg: DataFrame of Fangraphs pitching data from a given timeframe
 stat: DataFrame of Statcast pitching data from a given timeframe
@@ -344,12 +548,11 @@ team: DataFrame of team Fangraphs pitching data from a given timeframe
 bio: DataFrame of biographical data from a given timeframe
 df_id: DataFrame of player ID's from a given timeframe
 '''
-def genPitching(start_year,end_year):
-    fg = fgPitching(start_year,end_year)
-    df_id = genID(fg)
-    bio = genBio(df_id)
-    stat = fg.reset_index()[['key_mlbam','Season']].merge(statPitching(start_year,end_year), on=['key_mlbam','Season'], how='left').drop_duplicates()
-    bwar = fg.reset_index()[['key_mlbam','Season','Team']].merge(bwarPitching(start_year, end_year), on=['key_mlbam','Season','Team'],how='left')
+@instrument.stage
+def genPitching(start_year,end_year,session=None):
+    session = Session() if session is None else session
+    fg = fgPitching(start_year,end_year,session)
+    [stat, bwar, bio, df_id] = joinPlayers(fg, statPitching(start_year, end_year), bwarPitching(start_year, end_year), session)
     team = teamPitching(start_year, end_year)
     return [fg, stat, bwar, team, bio, df_id]
 
@@ -359,45 +562,213 @@ def genTeamFielding(year):
     fieldtemp = pyb.team_fielding(year).set_index("teamIDfg").drop(columns={"Team"}).merge(pyb.team_batting(year)[["teamIDfg", "Team"]], on="teamIDfg", how="left")
     return fieldtemp[["teamIDfg", "Team", "G", "GS", "Inn", "PO", "A", "E", "FE", "TE", "DP", "Scp", "SB", "CS", "PB", "WP", "FP", "rSB", "rGDP", "rARM", "rGFP", "rPM", "DRS", "BIZ", "RZR", "OOZ", "ARM", "DPR","RngR", "ErrR","UZR","Def","FRM","OAA","RAA"]]
 '''
+# position_cols: the frames genFielding splits fielding rows into, by Pos_short, with their extra columns
+position_cols = {'IF': infield_cols, 'OF': outfield_cols, 'C': catching_cols, 'P': pitchf_cols}
+
 '''
-genFielding(start_year, end_year)
+genFielding(id, start_year, end_year)
     INPUT
+id: ID frame with key_mlbam and key_fangraphs (see mergeIDs)
 start_year: beginning of year range to pull data
 end_year: end of year range to pull data
     OUTPUT
 inf: infielder-specific data from Fangraphs
-'''
+of: outfielder-specific data
+catch: catcher-specific data
+pitch: pitcher fielding data
+pos: each player's primary position (the Pos with the most innings) with Pos_short, one row per player
+    NOTES
+Rows are sorted by Pos_short once and each position frame is a contiguous slice of that frame
+'''
+@instrument.stage
 def genFielding(id, start_year, end_year):
     team_dfs = []
-    for team in fgteams:
-        temp = pyb.fielding_stats(start_year, 
-                                  end_year,
-                                  team=team,
-                                  qual=5,
-                                  split_seasons=True).rename(columns={'IDfg':'key_fangraphs'})
+    frames = fetch.fetchAll(fetch.teamCalls(fielding_stats, fgteams, start_year, end_year, qual=5, split_seasons=True),
+                            host='www.fangraphs.com')
+    for team, temp in zip(fgteams, frames):
+        temp = temp.rename(columns={'IDfg':'key_fangraphs'})
         temp['Team'] = fgteams[team]
         team_dfs.append(temp)
     field = pd.concat(team_dfs)
-    field['Pos_short'] = field['Pos'].map(dict)
+    field['Pos_short'] = pd.Categorical(field['Pos'].map(pos_dict), categories=list(position_cols))
+    field = field.dropna(subset=['Pos_short'])
     field = field.merge(id[['key_mlbam','key_fangraphs']], on='key_fangraphs', how='left').dropna(subset=['key_mlbam'])
-    inf = field.groupby('Pos_short').get_group('IF')[[col for col in fielding_cols] + [col for col in infield_cols]]
-    of = field.groupby('Pos_short').get_group('OF')[[col for col in fielding_cols] + [col for col in outfield_cols]]
-    catch = field.groupby('Pos_short').get_group('C')[[col for col in fielding_cols] + [col for col in catching_cols]]
-    pitch = field.groupby('Pos_short').get_group('P')[[col for col in fielding_cols] + [col for col in pitchf_cols]]
-    return [inf, of, catch, pitch]
-
-def master(start_year, end_year):
-    [b_fg, b_stat, b_bwar, b_team, b_bio, b_id] = genBatting(start_year, end_year)
-    [p_fg, p_stat, p_bwar, p_team, p_bio, p_id] = genPitching(start_year, end_year) #[fg, stat, bwar, team, bio, df_id]
+    field = schema.enforce(field, {**schema.fielding, **schema.infield, **schema.outfield, **schema.catching, **schema.pitchf}, 'genFielding')
+    field = field.sort_values('Pos_short', kind='stable', ignore_index=True)
+    bounds = np.searchsorted(field['Pos_short'].cat.codes.to_numpy(), np.arange(len(position_cols)+1))
+    parts = [field.iloc[bounds[i]:bounds[i+1]][fielding_cols + cols] for i, cols in enumerate(position_cols.values())]
+    inn = field.groupby(['key_mlbam', 'Pos', 'Pos_short'], observed=True, as_index=False)['Inn'].sum()
+    pos = inn.sort_values('Inn', ascending=False, kind='stable').drop_duplicates(subset=['key_mlbam'])
+    return parts + [pos[['key_mlbam', 'Pos', 'Pos_short']].reset_index(drop=True)]
+
+'''
+mergeIDs(b_bio, p_bio, b_id, p_id)
+    OUTPUT
+bio: batting and pitching biographical data, one row per player
+id: batting and pitching ID's, one row per player
+'''
+@instrument.stage
+def mergeIDs(b_bio, p_bio, b_id, p_id):
     bio = pd.concat([b_bio, p_bio]).drop_duplicates(subset=['key_mlbam'])
     id = pd.concat([b_id, p_id]).drop_duplicates(subset=['key_mlbam'])
-    [inf, of, catch, p_field] = genFielding(id, start_year, end_year)
-    bio = bio.merge(pd.concat([inf[['key_mlbam', 'Pos', 'Pos_short']], 
-                               of[['key_mlbam', 'Pos', 'Pos_short']], 
-                               catch[['key_mlbam', 'Pos', 'Pos_short']], 
-                               p_field[['key_mlbam', 'Pos', 'Pos_short']]]).drop_duplicates(subset=['key_mlbam']), on='key_mlbam', how='left')
-    bio['Pos'].fillna('DH', inplace=True)
-    bio['Pos_short'].fillna('DH', inplace=True)
-    gl = gameLogs(start_year, end_year)
-    td = teamDepot(start_year, end_year)
-    return [b_fg, p_fg, b_stat, p_stat, b_bwar, p_bwar, b_team, p_team, inf, of, catch, p_field, bio, id, gl, td]
\ No newline at end of file
+    return [bio, id]
+
+'''
+addPositions(bio, pos)
+    OUTPUT
+bio with each player's primary Pos/Pos_short from genFielding (DH if the player has no fielding rows)
+'''
+@instrument.stage
+def addPositions(bio, pos):
+    bio = bio.merge(pos, on='key_mlbam', how='left')
+    bio[['Pos', 'Pos_short']] = bio[['Pos', 'Pos_short']].astype('object').fillna('DH')
+    return bio
+
+# tables: names of the frames master() returns, in order
+tables = ['b_fg', 'p_fg', 'b_stat', 'p_stat', 'b_bwar', 'p_bwar', 'b_team', 'p_team', 'inf', 'of', 'catch', 'p_field', 'bio', 'id', 'gl', 'td']
+
+# table_keys: natural key of each table in tables, used to upsert refreshed rows into the local store
+table_keys = {
+    'b_fg': ['key_mlbam', 'Season', 'Team'],
+    'p_fg': ['key_mlbam', 'Season', 'Team'],
+    'b_stat': ['key_mlbam', 'Season'],
+    'p_stat': ['key_mlbam', 'Season'],
+    'b_bwar': ['key_mlbam', 'Season', 'Team'],
+    'p_bwar': ['key_mlbam', 'Season', 'Team'],
+    'b_team': ['Team', 'Season'],
+    'p_team': ['Team', 'Season'],
+    'inf': ['key_mlbam', 'Season', 'Team', 'Pos'],
+    'of': ['key_mlbam', 'Season', 'Team', 'Pos'],
+    'catch': ['key_mlbam', 'Season', 'Team', 'Pos'],
+    'p_field': ['key_mlbam', 'Season', 'Team', 'Pos'],
+    'bio': ['key_mlbam'],
+    'id': ['key_mlbam'],
+    'gl': game_key,
+    'td': ['Team', 'Season']
+}
+
+'''
+masterPipeline()
+    OUTPUT
+pipeline.Pipeline for master(): source fetches run side by side, the player joins wait on their fetches, fielding waits
+on the combined ID frame and the final bio waits on fielding. Run it with start_year, end_year and session.
+'''
+def masterPipeline():
+    S = pipeline.Stage
+    years = ['start_year', 'end_year']
+    return pipeline.Pipeline([
+        S('fgBatting', fgBatting, years + ['session'], ['b_fg']),
+        S('statBatting', statBatting, years, ['b_stat_src']),
+        S('bwarBatting', bwarBatting, years, ['b_bwar_src']),
+        S('teamBatting', teamBatting, years + ['session'], ['b_team']),
+        S('joinBatting', lambda b_fg, b_stat_src, b_bwar_src, session: joinPlayers(b_fg, b_stat_src, b_bwar_src, session),
+          ['b_fg', 'b_stat_src', 'b_bwar_src', 'session'], ['b_stat', 'b_bwar', 'b_bio', 'b_id']),
+        S('fgPitching', fgPitching, years + ['session'], ['p_fg']),
+        S('statPitching', statPitching, years, ['p_stat_src']),
+        S('bwarPitching', bwarPitching, years, ['p_bwar_src']),
+        S('teamPitching', teamPitching, years, ['p_team']),
+        S('joinPitching', lambda p_fg, p_stat_src, p_bwar_src, session: joinPlayers(p_fg, p_stat_src, p_bwar_src, session),
+          ['p_fg', 'p_stat_src', 'p_bwar_src', 'session'], ['p_stat', 'p_bwar', 'p_bio', 'p_id']),
+        S('mergeIDs', mergeIDs, ['b_bio', 'p_bio', 'b_id', 'p_id'], ['bio_all', 'id']),
+        S('genFielding', genFielding, ['id'] + years, ['inf', 'of', 'catch', 'p_field', 'pos']),
+        S('addPositions', lambda bio_all, pos: addPositions(bio_all, pos), ['bio_all', 'pos'], ['bio']),
+        S('gameLogs', gameLogs, years + ['session', 'since'], ['gl']),
+        S('teamDepot', teamDepot, years + ['session'], ['td']),
+    ])
+
+'''
+master(start_year, end_year, session, run, since)
+    INPUT
+start_year: beginning of year range to pull data
+end_year: end of year range to pull data
+session: Session shared by the run (a new one is created if omitted)
+run: pipeline from masterPipeline() to execute; pass the one attached to a PipelineError to re-run only failed stages
+since: only keep game logs from this date on (see refresh)
+    OUTPUT
+list of the 16 frames named in tables; the Pipeline (with per-stage timings in .report()) is kept as master.last
+'''
+@instrument.stage
+def master(start_year, end_year, session=None, run=None, since=None):
+    session = Session() if session is None else session
+    run = masterPipeline() if run is None else run
+    master.last = run
+    values = run.run(start_year=start_year, end_year=end_year, session=session, since=since)
+    return [values[name] for name in tables]
+
+'''
+masterSeasons(start_year, end_year, session, chunk)
+    INPUT
+start_year: beginning of year range to pull data
+end_year: end of year range to pull data
+session: Session shared by every slice
+chunk: number of seasons per slice
+    OUTPUT
+generator of (first, last, frames) per slice of seasons, frames being a dict of table name -> DataFrame (as master())
+for those seasons only
+    NOTES
+Each slice runs the whole master pipeline on its own. Only one slice is held in memory as long as the caller drops
+its frames before asking for the next one (see backfill)
+'''
+def masterSeasons(start_year, end_year, session=None, chunk=1):
+    session = Session() if session is None else session
+    for first in range(start_year, end_year+1, chunk):
+        last = min(first+chunk-1, end_year)
+        yield first, last, dict(zip(tables, master(first, last, session)))
+
+'''
+backfill(path, start_year, end_year, session, chunk)
+    INPUT
+path: directory of the local store (see store.py)
+start_year: beginning of year range to pull data
+end_year: end of year range to pull data
+session: Session shared by every slice
+chunk: number of seasons per slice
+    NOTES
+Streams masterSeasons() into the store: each slice is merged into the stored tables (store.merge) and released before
+the next one is fetched, so peak memory is bounded by one slice however long the range. Stored rows of the same seasons
+are replaced; bio/id rows are upserted by key_mlbam, so a player's bio comes from the latest slice they appear in.
+meta.json is updated after every slice, so an interrupted backfill can resume from the stored end_year + 1.
+'''
+@instrument.stage
+def backfill(path, start_year, end_year, session=None, chunk=1):
+    for first, last, frames in masterSeasons(start_year, end_year, session, chunk):
+        for name in tables:
+            store.merge(path, name, frames[name], table_keys[name])
+        info = store.meta(path)
+        store.saveMeta(path, start_year=min(info.get('start_year') or first, first),
+                       end_year=max(info.get('end_year') or last, last))
+        del frames
+
+'''
+refresh(path, start_year, end_year, session)
+    INPUT
+path: directory of the local store (see store.py)
+start_year: beginning of year range, used when the store is empty
+end_year: end of year range (defaults to the current season)
+session: Session shared by the run
+    OUTPUT
+dict of the rows fetched by this refresh, per table
+    NOTES
+An empty store is filled with a full master(start_year, end_year) (use backfill() for long ranges). Afterwards only the last stored season (it may have
+been in progress when it was saved) through end_year is re-fetched, game logs keep only games from the last stored
+date on (games of that date that finished after the last run are picked up), and the new rows replace stored rows with the same natural key (table_keys). Only the refreshed Season
+partitions (and the unpartitioned bio/id tables) are read and rewritten.
+'''
+@instrument.stage
+def refresh(path, start_year=None, end_year=None, session=None):
+    session = Session() if session is None else session
+    end_year = cache.currentSeason() if end_year is None else end_year
+    info = store.meta(path)
+    if info is None:
+        frames = dict(zip(tables, master(start_year, end_year, session)))
+        store.save(path, frames, start_year=start_year, end_year=end_year)
+        return frames
+    if not set(table_keys['gl']) <= set(info['columns']['gl']):
+        raise ValueError('%s holds game logs in the old two-rows-per-game layout; rebuild it with an empty path' % path)
+    first = min(info['end_year'], end_year)
+    since = store.read(path, 'gl', columns=['Date'], seasons=[info['end_year']])['Date'].max()
+    new = dict(zip(tables, master(first, end_year, session, since=since)))
+    for name in tables:
+        store.merge(path, name, new[name], table_keys[name])
+    store.saveMeta(path, end_year=max(info['end_year'], end_year))
+    return new
@@ -0,0 +1,199 @@
+import numpy as np
+import pandas as pd
+import store
+
+# fact_tables: frames from master() (or the local store) that FactStore indexes; missing ones are skipped
+fact_tables = ['b_fg', 'p_fg', 'b_stat', 'p_stat', 'b_bwar', 'p_bwar', 'inf', 'of', 'catch', 'p_field', 'bio']
+
+# key_levels: the player-season key every table is placed on
+key_levels = ['key_mlbam', 'Season', 'Team']
+
+# Keys are packed into one int64 so that numeric order is (key_mlbam, Season, Team) order:
+# key_mlbam << 24 | Season << 8 | team code. Tables without Team (Statcast) or Season (bio) use the masked prefix.
+team_bits = 8
+season_bits = 16
+prefix_masks = {3: ~0, 2: ~((1 << team_bits) - 1), 1: ~((1 << (team_bits + season_bits)) - 1)}
+
+'''
+packKeys(df, teams)
+    INPUT
+df: DataFrame with key_mlbam and optionally Season and Team (as columns or index levels)
+teams: sorted array of every team code in the store
+    OUTPUT
+(keys, levels): packed int64 key per row (-1 where key_mlbam/Season/Team is missing) and how many key levels df has
+'''
+def packKeys(df, teams):
+    df = df.reset_index() if 'key_mlbam' in df.index.names else df
+    levels = 1 + ('Season' in df.columns) + ('Team' in df.columns and 'Season' in df.columns)
+    mlbam = pd.to_numeric(df['key_mlbam'])
+    valid = mlbam.notna().to_numpy()
+    keys = mlbam.fillna(0).to_numpy('int64') << (team_bits + season_bits)
+    if levels > 1:
+        season = pd.to_numeric(df['Season'])
+        valid = valid & season.notna().to_numpy()
+        keys = keys | season.fillna(0).to_numpy('int64') << team_bits
+    if levels > 2:
+        codes = pd.Categorical(df['Team'].astype('object'), categories=teams).codes.astype('int64')
+        valid = valid & (codes >= 0)
+        keys = keys | codes
+    return np.where(valid, keys, -1), levels
+
+'''
+FactStore(frames)
+    INPUT
+frames: dict of table name -> DataFrame, as dict(zip(dataimport.tables, master(...))) or store.load(path)
+    NOTES
+Built once per run. The spine is the sorted, unique (key_mlbam, Season, Team) of every table that has a Team. Each
+table gets a join plan: the first and last+1 row (in that table's own sorted order) matching every spine row, found
+with one searchsorted per table, so lookups never merge or rescan a table. Statcast rows (no Team) are shared by every
+team of the player's season and bio rows (no Season) by every season. Players, seasons and teams each have a sorted
+order of spine rows, so point, range and batched lookups are binary searches.
+'''
+class FactStore:
+    def __init__(self, frames):
+        self.frames = {name: frames[name] for name in fact_tables if name in frames}
+        team_cols = [df['Team'].astype('object') for df in self.frames.values() if 'Team' in df.columns]
+        self.teams = np.sort(pd.unique(pd.concat(team_cols).dropna()).astype(str)) if team_cols else np.array([], dtype=str)
+        if len(self.teams) >= 1 << team_bits:
+            raise ValueError('%d teams do not fit the packed key' % len(self.teams))
+
+        sorted_keys, orders, levels = {}, {}, {}
+        for name, df in self.frames.items():
+            keys, levels[name] = packKeys(df, self.teams)
+            order = np.argsort(keys, kind='stable')
+            order = order[keys[order] >= 0]
+            sorted_keys[name], orders[name] = keys[order], order
+        spine = [sorted_keys[name] for name in self.frames if levels[name] == 3]
+        self.keys = np.unique(np.concatenate(spine)) if spine else np.array([], dtype='int64')
+
+        # join plans: rows order[name][lo:hi] of table name belong to spine row i
+        self.plans = {}
+        for name in self.frames:
+            probe = self.keys & prefix_masks[levels[name]]
+            lo = np.searchsorted(sorted_keys[name], probe, side='left')
+            hi = np.searchsorted(sorted_keys[name], probe, side='right')
+            self.plans[name] = (orders[name], lo, hi)
+
+        mlbam = self.keys >> (team_bits + season_bits)
+        season = (self.keys >> team_bits) & ((1 << season_bits) - 1)
+        team = self.keys & ((1 << team_bits) - 1)
+        self.index = pd.MultiIndex.from_arrays([mlbam.astype('int32'), season.astype('int16'),
+                                                pd.Categorical.from_codes(team, categories=self.teams)], names=key_levels)
+        # secondary orders: spine rows sorted by Season and by Team (the spine itself is sorted by player)
+        self.by = {'key_mlbam': (mlbam, np.arange(len(self.keys)))}
+        for level, values in (('Season', season), ('Team', team)):
+            order = np.argsort(values, kind='stable')
+            self.by[level] = (values[order], order)
+
+    '''
+    load(path, seasons)
+        INPUT
+    path: directory of the local store (see store.py)
+    seasons: iterable of seasons to load (defaults to all)
+        OUTPUT
+    FactStore over the stored tables; only the requested Season partitions are read
+    '''
+    @classmethod
+    def load(cls, path, seasons=None):
+        names = [name for name in fact_tables if name in store.meta(path)['tables']]
+        frames = {name: store.read(path, name, seasons=seasons if name != 'bio' else None) for name in names}
+        return cls(frames)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def match(self, level, values):
+        sorted_values, order = self.by[level]
+        lo = np.searchsorted(sorted_values, values, side='left')
+        hi = np.searchsorted(sorted_values, values, side='right')
+        return np.sort(order[ranges(lo, hi)])
+
+    '''
+    rows(players, seasons, teams)
+        INPUT
+    players: key_mlbam or list of them
+    seasons: season, list or range of seasons
+    teams: team or list of teams
+        OUTPUT
+    sorted array of spine positions matching every given filter (all rows if none is given)
+    '''
+    def rows(self, players=None, seasons=None, teams=None):
+        out = None
+        for level, values in (('key_mlbam', players), ('Season', seasons), ('Team', teams)):
+            if values is None:
+                continue
+            values = np.unique(np.atleast_1d(np.asarray(list(values) if isinstance(values, range) else values)))
+            if level == 'Team':
+                values = values.astype(str)
+                codes = np.searchsorted(self.teams, values)
+                values = codes[(codes < len(self.teams)) & (self.teams[np.minimum(codes, len(self.teams)-1)] == values)]
+            found = self.match(level, values)
+            out = found if out is None else np.intersect1d(out, found, assume_unique=True)
+        return np.arange(len(self.keys)) if out is None else out
+
+    '''
+    get(table, columns, players, seasons, teams)
+        INPUT
+    table: name of a table in fact_tables
+    columns: columns to return (defaults to every non-key column)
+    players, seasons, teams: filters, see rows()
+        OUTPUT
+    DataFrame of the table's rows for the matching spine rows, indexed by (key_mlbam, Season, Team). Tables with several
+    rows per key (fielding, one per Pos) repeat the index; spine rows the table has no row for are left out.
+    '''
+    def get(self, table, columns=None, players=None, seasons=None, teams=None):
+        rows = self.rows(players, seasons, teams)
+        order, lo, hi = self.plans[table]
+        counts = hi[rows] - lo[rows]
+        df = self.frames[table]
+        df = df.reset_index() if 'key_mlbam' in df.index.names else df
+        columns = [col for col in df.columns if col not in key_levels] if columns is None else columns
+        out = df.iloc[order[ranges(lo[rows], hi[rows])], columnPositions(df, columns)]
+        out.index = self.index[np.repeat(rows, counts)]
+        return out
+
+    '''
+    pull(columns, players, seasons, teams)
+        INPUT
+    columns: dict of table name -> list of columns, e.g. {'b_fg': ['wRC+'], 'b_stat': ['xwOBA'], 'b_bwar': ['WAR']}
+    players, seasons, teams: filters, see rows()
+        OUTPUT
+    DataFrame with one row per matching spine row and (table, column) MultiIndex columns; missing values are NaN
+        NOTES
+    Each table contributes the first row of its key (use get() for every fielding row of a player)
+    '''
+    def pull(self, columns, players=None, seasons=None, teams=None):
+        rows = self.rows(players, seasons, teams)
+        parts = []
+        for table, cols in columns.items():
+            order, lo, hi = self.plans[table]
+            found = hi[rows] > lo[rows]
+            df = self.frames[table]
+            df = df.reset_index() if 'key_mlbam' in df.index.names else df
+            part = df.iloc[order[lo[rows][found]], columnPositions(df, cols)]
+            part.index = np.flatnonzero(found)
+            parts.append(part.reindex(np.arange(len(rows))))
+        out = pd.concat(parts, axis=1, keys=list(columns))
+        out.index = self.index[rows]
+        return out
+
+'''
+columnPositions(df, columns)
+    OUTPUT
+positions of columns in df; raises KeyError naming any column df does not have
+'''
+def columnPositions(df, columns):
+    positions = df.columns.get_indexer(columns)
+    if (positions < 0).any():
+        raise KeyError([col for col, pos in zip(columns, positions) if pos < 0])
+    return positions
+
+'''
+ranges(lo, hi)
+    OUTPUT
+concatenation of np.arange(lo[i], hi[i]) for every i, without a Python loop
+'''
+def ranges(lo, hi):
+    counts = hi - lo
+    starts = np.repeat(lo - np.cumsum(counts) + counts, counts)
+    return starts + np.arange(counts.sum())
@@ -0,0 +1,114 @@
+import time
+import random
+import threading
+import contextvars
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+# max_workers: how many source requests may be in flight at once
+max_workers = 8
+
+# host_rates: minimum number of seconds between two requests to the same host
+# hosts not listed here are not throttled
+host_rates = {
+    'www.fangraphs.com': 0.2,
+    'baseballsavant.mlb.com': 0.2,
+    'www.baseball-reference.com': 3.0
+}
+
+# retries/backoff: a failed call is retried up to `retries` times, sleeping backoff * 2**attempt (plus jitter) in between
+retries = 3
+backoff = 1.0
+
+# retry_on: transient network errors worth retrying; retry_status: HTTP statuses worth retrying (rate limited, server errors)
+# anything else (bad arguments, a missing replay fixture) is raised at once
+retry_on = (requests.ConnectionError, requests.Timeout)
+retry_status = {429, 500, 502, 503, 504}
+
+'''
+RateLimiter(rates)
+    INPUT
+rates: dict of host -> minimum seconds between requests (defaults to host_rates)
+    NOTES
+Thread-safe; wait(host) blocks the calling thread until the host's next slot is free
+'''
+class RateLimiter:
+    def __init__(self, rates=None):
+        self.rates = host_rates if rates is None else rates
+        self.lock = threading.Lock()
+        self.next_slot = {}
+
+    def wait(self, host):
+        interval = self.rates.get(host, 0)
+        if not interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + interval
+        if slot > now:
+            time.sleep(slot - now)
+
+# limiter: shared by every fetchAll() call so concurrent stages still respect the per-host limits
+limiter = RateLimiter()
+
+'''
+retryable(error)
+    OUTPUT
+True if error is a transient network error (retry_on) or an HTTP error with a status in retry_status
+'''
+def retryable(error):
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code in retry_status
+    return isinstance(error, retry_on)
+
+'''
+call(func, args, kwargs, host, limiter)
+    INPUT
+func: source function (e.g. pyb.batting_stats, or a stub standing in for it)
+args, kwargs: arguments for func
+host: host name used for rate limiting (None to skip throttling)
+limiter: RateLimiter to wait on
+    OUTPUT
+return value of func, retrying with exponential backoff on retryable() errors
+'''
+def call(func, args=(), kwargs=None, host=None, limiter=limiter):
+    kwargs = {} if kwargs is None else kwargs
+    for attempt in range(retries + 1):
+        if host is not None:
+            limiter.wait(host)
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt == retries or not retryable(e):
+                raise
+            time.sleep(backoff * 2**attempt + random.uniform(0, backoff))
+
+'''
+teamCalls(func, teams, *args, **kwargs)
+    INPUT
+func: source function taking a team= keyword
+teams: iterable of team keys (e.g. fgteams)
+*args, **kwargs: arguments shared by every call
+    OUTPUT
+list of (func, args, kwargs) calls, one per team, in the order of teams
+'''
+def teamCalls(func, teams, *args, **kwargs):
+    return [(func, args, dict(kwargs, team=team)) for team in teams]
+
+'''
+fetchAll(calls, host, workers)
+    INPUT
+calls: list of (func, args, kwargs) tuples
+host: host name the calls hit, for rate limiting
+workers: size of the thread pool (defaults to max_workers)
+    OUTPUT
+list of results in the same order as calls
+'''
+def fetchAll(calls, host=None, workers=None):
+    workers = max_workers if workers is None else workers
+    if workers <= 1 or len(calls) <= 1:
+        return [call(func, args, kwargs, host) for func, args, kwargs in calls]
+    with ThreadPoolExecutor(max_workers=min(workers, len(calls))) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, call, func, args, kwargs, host) for func, args, kwargs in calls]
+        return [future.result() for future in futures]
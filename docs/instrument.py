@@ -0,0 +1,227 @@
+import json
+import time
+import pstats
+import cProfile
+import threading
+import functools
+import contextvars
+import tracemalloc
+import pandas as pd
+
+# recorder: the active Recorder (set by run()); when None the wrappers below only cost a None check
+recorder = None
+
+# parent: name of the innermost instrumented call in the current context (pipeline and fetch threads inherit it)
+parent = contextvars.ContextVar('parent', default=None)
+
+# downloaded: byte counter of the innermost instrumented source call in the current context
+downloaded = contextvars.ContextVar('downloaded', default=None)
+
+local = threading.local()
+counter_lock = threading.Lock()
+patched = False
+
+'''
+Recorder(profile, trace_memory)
+    INPUT
+profile: run the outermost instrumented call (stage or source) on each thread under cProfile and merge the results
+(see stats()); source calls on fetchAll worker threads get profiles of their own
+trace_memory: track Python allocations with tracemalloc and record the traced delta per call
+    NOTES
+Collects one event per instrumented call: kind ('stage' or 'source'), name, parent, thread, start, seconds,
+rows_in/rows_out, mem_in/mem_out (shallow DataFrame bytes), bytes downloaded and the error, if any
+'''
+class Recorder:
+    def __init__(self, profile=False, trace_memory=False):
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.events = []
+        self.lock = threading.Lock()
+        self.profiles = []
+        self.origin = time.perf_counter()
+        self.peak = None
+
+    def add(self, event):
+        with self.lock:
+            self.events.append(event)
+
+    '''
+    summary()
+        OUTPUT
+    DataFrame with one row per instrumented function: calls, total seconds, rows in/out, memory delta and MB downloaded
+    '''
+    def summary(self):
+        events = pd.DataFrame(self.events, columns=['kind', 'name', 'parent', 'thread', 'start', 'seconds', 'rows_in',
+                                                    'rows_out', 'mem_in', 'mem_out', 'bytes', 'traced', 'error'])
+        events['mem_delta_mb'] = (events['mem_out'] - events['mem_in']) / 1024**2
+        events['downloaded_mb'] = events['bytes'] / 1024**2
+        out = events.groupby(['kind', 'name']).agg(calls=('seconds', 'size'),
+                                                   seconds=('seconds', 'sum'),
+                                                   rows_in=('rows_in', 'sum'),
+                                                   rows_out=('rows_out', 'sum'),
+                                                   mem_delta_mb=('mem_delta_mb', 'sum'),
+                                                   downloaded_mb=('downloaded_mb', 'sum'),
+                                                   errors=('error', 'count'))
+        return out.sort_values('seconds', ascending=False).reset_index()
+
+    '''
+    stats()
+        OUTPUT
+    pstats.Stats merged from every profiled stage (profile=True), or None
+    '''
+    def stats(self):
+        if not self.profiles:
+            return None
+        merged = pstats.Stats(self.profiles[0])
+        for prof in self.profiles[1:]:
+            merged.add(prof)
+        return merged
+
+    '''
+    log(path)
+        NOTES
+    Writes the event log as JSON lines
+    '''
+    def log(self, path):
+        with open(path, 'w') as f:
+            for event in self.events:
+                f.write(json.dumps(event, default=str) + '\n')
+
+'''
+countBytes()
+    NOTES
+Wraps requests' HTTPAdapter.send once so every response's size is added to the innermost source call's counter.
+Streamed responses are counted by Content-Length; downloads that bypass requests are not seen.
+'''
+def countBytes():
+    global patched
+    if patched:
+        return
+    try:
+        import requests.adapters
+    except ImportError:
+        return
+    send = requests.adapters.HTTPAdapter.send
+
+    @functools.wraps(send)
+    def counted(self, request, stream=False, **kwargs):
+        resp = send(self, request, stream=stream, **kwargs)
+        counter = downloaded.get()
+        if counter is not None:
+            size = int(resp.headers.get('Content-Length', 0)) if stream else len(resp.content)
+            with counter_lock:
+                counter[0] += size
+        return resp
+
+    requests.adapters.HTTPAdapter.send = counted
+    patched = True
+
+'''
+run(profile, trace_memory, report)
+    INPUT
+profile, trace_memory: see Recorder
+report: print the summary table when the block exits
+    OUTPUT
+context manager yielding the Recorder that collects every instrumented call inside the block
+'''
+class run:
+    def __init__(self, profile=False, trace_memory=False, report=True):
+        self.recorder = Recorder(profile, trace_memory)
+        self.report = report
+
+    def __enter__(self):
+        global recorder
+        countBytes()
+        if self.recorder.trace_memory:
+            tracemalloc.start()
+        recorder = self.recorder
+        return self.recorder
+
+    def __exit__(self, *exc):
+        global recorder
+        recorder = None
+        if self.recorder.trace_memory:
+            self.recorder.peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        if self.report:
+            print(self.recorder.summary().to_string(index=False))
+            if self.recorder.peak is not None:
+                print('tracemalloc peak: %.1f MB' % (self.recorder.peak / 1024**2))
+        return False
+
+def frameSize(value):
+    if isinstance(value, pd.DataFrame):
+        return len(value), int(value.memory_usage(deep=False).sum())
+    if isinstance(value, (list, tuple)):
+        sizes = [frameSize(item) for item in value]
+        return sum(rows for rows, _ in sizes), sum(mem for _, mem in sizes)
+    return 0, 0
+
+def record(kind, func, args, kwargs):
+    rec = recorder
+    name = func.__name__
+    rows_in, mem_in = frameSize(list(args) + list(kwargs.values()))
+    counter = [0]
+    parent_token = parent.set(name)
+    counter_token = downloaded.set(counter) if kind == 'source' else None
+    prof = None
+    if rec.profile and not getattr(local, 'profiling', False):
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+            local.profiling = True
+        except ValueError:
+            # another profiler is active (Python 3.12+ allows only one at a time, and it sees every thread), run this call unprofiled
+            prof = None
+    traced = tracemalloc.get_traced_memory()[0] if rec.trace_memory else None
+    start = time.perf_counter()
+    out = None
+    error = None
+    try:
+        out = func(*args, **kwargs)
+        return out
+    except Exception as e:
+        error = repr(e)
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        if prof is not None:
+            prof.disable()
+            local.profiling = False
+            with rec.lock:
+                rec.profiles.append(prof)
+        if counter_token is not None:
+            downloaded.reset(counter_token)
+        parent.reset(parent_token)
+        rows_out, mem_out = frameSize(out)
+        rec.add({'kind': kind, 'name': name, 'parent': parent.get(), 'thread': threading.current_thread().name,
+                 'start': start - rec.origin, 'seconds': seconds, 'rows_in': rows_in, 'rows_out': rows_out,
+                 'mem_in': mem_in, 'mem_out': mem_out, 'bytes': counter[0],
+                 'traced': tracemalloc.get_traced_memory()[0] - traced if traced is not None else None,
+                 'error': error})
+
+'''
+stage(func)
+    NOTES
+Decorator for pipeline functions: while a run() block is active, records an event per call
+'''
+def stage(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if recorder is None:
+            return func(*args, **kwargs)
+        return record('stage', func, args, kwargs)
+    return wrapper
+
+'''
+source(func)
+    NOTES
+Wrapper for source calls: like stage(), and also counts the bytes downloaded during the call
+'''
+def source(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if recorder is None:
+            return func(*args, **kwargs)
+        return record('source', func, args, kwargs)
+    return wrapper
@@ -0,0 +1,121 @@
+import time
+import collections
+import contextvars
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# max_workers: how many stages may run at once (each stage may still fan out through fetch.fetchAll)
+max_workers = 6
+
+'''
+Stage(name, func, inputs, outputs)
+    name: label used in reports
+    func: called with one keyword argument per input
+    inputs: names of the values the stage reads (outputs of other stages, or values passed to Pipeline.run)
+    outputs: names of the values the stage produces; func returns a list in this order (or the bare value if there is one)
+'''
+Stage = collections.namedtuple('Stage', ['name', 'func', 'inputs', 'outputs'])
+
+class PipelineError(RuntimeError):
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        failed = ', '.join('%s (%r)' % (name, pipeline.errors[name]) for name in pipeline.failed)
+        super().__init__('pipeline stages failed: ' + failed)
+
+'''
+Pipeline(stages, workers)
+    INPUT
+stages: list of Stage
+workers: thread pool size (defaults to max_workers)
+    NOTES
+run(**values) executes every stage that has not finished yet, starting each one as soon as its inputs exist, so
+independent branches overlap. A failed stage marks its downstream stages as skipped and run() raises PipelineError;
+calling run() again re-runs only the failed and skipped stages, reusing the outputs already computed.
+'''
+class Pipeline:
+    def __init__(self, stages, workers=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.workers = max_workers if workers is None else workers
+        self.producer = {}
+        for stage in stages:
+            for out in stage.outputs:
+                if out in self.producer:
+                    raise ValueError('%s is produced by both %s and %s' % (out, self.producer[out], stage.name))
+                self.producer[out] = stage.name
+        self.values = {}
+        self.status = {name: 'pending' for name in self.stages}
+        self.errors = {}
+        self.timings = {}
+
+    @property
+    def failed(self):
+        return [name for name in self.stages if self.status[name] == 'failed']
+
+    def ready(self, name):
+        return all(inp in self.values for inp in self.stages[name].inputs)
+
+    def execute(self, name):
+        stage = self.stages[name]
+        start = time.perf_counter()
+        try:
+            result = stage.func(**{inp: self.values[inp] for inp in stage.inputs})
+        finally:
+            self.timings[name] = (start, time.perf_counter())
+        if len(stage.outputs) == 1:
+            result = [result]
+        return dict(zip(stage.outputs, result))
+
+    def skipDownstream(self, name):
+        lost = set(self.stages[name].outputs)
+        for other in self.stages.values():
+            if self.status[other.name] == 'pending' and lost.intersection(other.inputs):
+                self.status[other.name] = 'skipped'
+                self.skipDownstream(other.name)
+
+    def run(self, **values):
+        self.values.update(values)
+        todo = [name for name in self.stages if self.status[name] != 'done']
+        for name in todo:
+            self.status[name] = 'pending'
+            self.errors.pop(name, None)
+        for name in todo:
+            missing = [inp for inp in self.stages[name].inputs if inp not in self.values and inp not in self.producer]
+            if missing:
+                raise ValueError('stage %s needs %s' % (name, ', '.join(missing)))
+
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while True:
+                for name in todo:
+                    if self.status[name] == 'pending' and self.ready(name):
+                        self.status[name] = 'running'
+                        running[pool.submit(contextvars.copy_context().run, self.execute, name)] = name
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        self.values.update(future.result())
+                        self.status[name] = 'done'
+                    except Exception as e:
+                        self.status[name] = 'failed'
+                        self.errors[name] = e
+                        self.skipDownstream(name)
+        if self.failed:
+            raise PipelineError(self) from self.errors[self.failed[0]]
+        return self.values
+
+    '''
+    report()
+        OUTPUT
+    DataFrame with status, start offset and elapsed seconds per stage (offsets relative to the earliest stage start)
+    '''
+    def report(self):
+        origin = min((start for start, _ in self.timings.values()), default=0)
+        rows = [{'stage': name,
+                 'status': self.status[name],
+                 'start': self.timings[name][0] - origin if name in self.timings else None,
+                 'seconds': self.timings[name][1] - self.timings[name][0] if name in self.timings else None}
+                for name in self.stages]
+        return pd.DataFrame(rows)
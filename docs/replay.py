@@ -0,0 +1,73 @@
+import io
+import os
+import functools
+import pandas as pd
+import cache
+
+# fixture_dir: where recorded source responses live (override with the SAC_FIXTURE_DIR environment variable)
+fixture_dir = os.environ.get('SAC_FIXTURE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures'))
+
+# mode: 'off' calls the sources, 'record' calls them and saves every response, 'replay' serves saved responses only
+# (set with the SAC_REPLAY environment variable or by assigning replay.mode)
+mode = os.environ.get('SAC_REPLAY', 'off')
+
+'''
+fixturePath(name, args, kwargs, ext)
+    OUTPUT
+fixture file for a call, named after the function and keyed like the source cache
+'''
+def fixturePath(name, args, kwargs, ext):
+    return os.path.join(fixture_dir, name.rsplit('.', 1)[-1], cache.cacheKey(name, args, kwargs) + ext)
+
+'''
+recorded(func)
+    INPUT
+func: source function returning a DataFrame (e.g. a cache.cached pybaseball call)
+    OUTPUT
+wrapped function that records or replays responses according to mode
+    NOTES
+In replay mode a call without a fixture raises FileNotFoundError instead of touching the network
+'''
+def recorded(func):
+    name = cache.funcName(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if mode == 'off':
+            return func(*args, **kwargs)
+        path = fixturePath(name, args, kwargs, '.pkl')
+        if mode == 'replay':
+            return pd.read_pickle(path)
+        df = func(*args, **kwargs)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pd.to_pickle(df, path)
+        return df
+    return wrapper
+
+'''
+recordedStream(func)
+    INPUT
+func: function returning a binary file-like object (e.g. bwar.warFile)
+    OUTPUT
+wrapped function that records the raw bytes or replays them from a fixture according to mode
+'''
+def recordedStream(func):
+    name = cache.funcName(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if mode == 'off':
+            return func(*args, **kwargs)
+        path = fixturePath(name, args, kwargs, '.raw')
+        if mode == 'replay':
+            return open(path, 'rb')
+        raw = func(*args, **kwargs)
+        try:
+            data = raw.read()
+        finally:
+            raw.close()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return io.BytesIO(data)
+    return wrapper
@@ -0,0 +1,119 @@
+import threading
+import numpy as np
+import pandas as pd
+
+# Compact dtypes for every column list in dataimport.py. Counting stats fit in int16 (a season never reaches 32767
+# of anything we pull), IDs in int32, rates/run values in float32, and repeated labels become categoricals.
+# Integer columns that contain missing values (e.g. Statcast-era stats before 2015) get the nullable Int variant.
+
+# id_cols: identifier and label columns shared by the FanGraphs player frames
+id_cols = {'key_mlbam':'int32', 'key_fangraphs':'int32', 'Name':'category', 'Team':'category', 'Season':'int16',
+           'Age':'int8', 'G':'int16', 'GS':'int16'}
+
+hitting = dict.fromkeys(['AB', 'PA', 'H', '1B', '2B', '3B', 'HR', 'R', 'RBI', 'BB', 'IBB', 'SO', 'HBP', 'SF', 'SH',
+                         'GDP', 'SB', 'CS', 'GB', 'FB', 'LD', 'IFFB', 'IFH', 'BU', 'BUH', 'PH', 'Barrels', 'HardHit'], 'int16')
+hitting.update(dict.fromkeys(['AVG', 'BB%', 'K%', 'BB/K', 'OBP', 'SLG', 'OPS', 'ISO', 'BABIP', 'GB/FB', 'LD%', 'GB%',
+                              'FB%', 'IFFB%', 'HR/FB', 'IFH%', 'BUH%', 'wOBA', 'wRAA', 'wRC', 'WAR', 'Spd', 'wRC+',
+                              'WPA', '-WPA', '+WPA', 'pLI', 'phLI', 'WPA/LI', 'Clutch', 'O-Swing%', 'Z-Swing%',
+                              'Swing%', 'O-Contact%', 'Z-Contact%', 'Contact%', 'Zone%', 'SwStr%', 'Pace', 'wSB',
+                              'UBR', 'Off', 'wGDP', 'Pull%', 'Cent%', 'Oppo%', 'Soft%', 'Med%', 'Hard%', 'TTO%', 'EV',
+                              'LA', 'Barrel%', 'maxEV', 'HardHit%', 'CStr%', 'xBA', 'xSLG', 'xwOBA'], 'float32'))
+
+pitching = dict.fromkeys(['W', 'L', 'CG', 'ShO', 'SV', 'BS', 'TBF', 'H', 'R', 'ER', 'HR', 'BB', 'IBB', 'BK', 'SO',
+                          'GB', 'FB', 'LD', 'IFFB', 'Balls', 'Strikes', 'Pitches', 'RS', 'IFH', 'BU', 'BUH', 'SD',
+                          'MD', 'HLD'], 'int16')
+pitching.update(dict.fromkeys(['ERA', 'IP', 'K/9', 'BB/9', 'K/BB', 'H/9', 'HR/9', 'AVG', 'WHIP', 'BABIP', 'LOB%',
+                               'FIP', 'GB/FB', 'LD%', 'GB%', 'FB%', 'IFFB%', 'HR/FB', 'IFH%', 'BUH%', 'WAR', 'tERA',
+                               'xFIP', 'WPA', '-WPA', '+WPA', 'pLI', 'inLI', 'exLI', 'Clutch', 'FBv', 'SLv', 'CTv',
+                               'CBv', 'CHv', 'SFv', 'O-Swing%', 'Z-Swing%', 'Swing%', 'O-Contact%', 'Z-Contact%',
+                               'Contact%', 'Zone%', 'F-Strike%', 'SwStr%', 'ERA-', 'FIP-', 'xFIP-', 'K%', 'BB%',
+                               'SIERA', 'RS/9', 'E-F', 'K-BB%', 'Pull%', 'Cent%', 'Oppo%', 'Soft%', 'Med%', 'Hard%',
+                               'kwERA', 'FRM', 'Barrel%', 'HardHit%', 'CStr%', 'CSW%', 'xERA'], 'float32'))
+
+fielding = dict(id_cols, Pos='category', Pos_short='category', Inn='float32', FP='float32')
+fielding.update(dict.fromkeys(['PO', 'A', 'E', 'FE', 'TE', 'DP', 'DPS', 'DPT', 'DPF', 'rGFP', 'DRS'], 'int16'))
+
+infield = dict.fromkeys(['Scp', 'rGDP', 'rPM', 'BIZ', 'OOZ', 'OAA'], 'int16')
+infield.update(dict.fromkeys(['RZR', 'DPR', 'RngR', 'ErrR', 'UZR', 'UZR/150', 'Def', 'RAA'], 'float32'))
+
+outfield = dict.fromkeys(['rARM', 'rPM', 'BIZ', 'OOZ', 'OAA'], 'int16')
+outfield.update(dict.fromkeys(['ARM', 'RZR', 'RngR', 'ErrR', 'UZR', 'UZR/150', 'Def', 'RAA'], 'float32'))
+
+catching = dict.fromkeys(['SB', 'CS', 'PB', 'WP', 'rSB', 'rCERA'], 'int16')
+catching.update(dict.fromkeys(['Def', 'FRM'], 'float32'))
+
+pitchf = dict.fromkeys(['SB', 'rSB'], 'int16')
+
+# statcast: Savant leaderboards have no column list in dataimport.py; IDs are pinned and every other numeric column
+# becomes float32, so every season writes the same Parquet schema and left merges keep the compact types
+statcast = {'key_mlbam':'int32', 'Season':'int16'}
+
+# report: set to True to record memory before/after for every enforce() call (see memoryReport)
+report = False
+reports = []
+lock = threading.Lock()
+
+'''
+check(columns, spec)
+    INPUT
+columns: a column list from dataimport.py
+spec: dict of column -> dtype
+    NOTES
+Raises ValueError naming every column of the list that has no dtype in spec
+'''
+def check(columns, spec):
+    missing = [col for col in columns if col not in spec]
+    if missing:
+        raise ValueError('no dtype declared for: ' + ', '.join(missing))
+
+'''
+enforce(df, spec, name, downcast)
+    INPUT
+df: DataFrame fresh from a source
+spec: dict of column -> dtype (columns of spec missing from df are ignored)
+name: label used in the memory report
+downcast: also store numeric columns that are not in spec as float32, whatever their values
+    OUTPUT
+df with compact dtypes
+    NOTES
+Raises ValueError if an integer column holds fractional values or values outside the declared type's range
+'''
+def enforce(df, spec, name=None, downcast=False):
+    before = df.memory_usage(deep=True).sum() if report else None
+    types = {}
+    bad = []
+    for col in df.columns:
+        if col in spec:
+            dtype = spec[col]
+            if dtype != 'category' and np.dtype(dtype).kind == 'i':
+                values = pd.to_numeric(df[col], errors='coerce')
+                info = np.iinfo(dtype)
+                present = values.dropna()
+                if (present != present.round()).any() or present.lt(info.min).any() or present.gt(info.max).any() \
+                        or values.isna().sum() != df[col].isna().sum():
+                    bad.append(col)
+                    continue
+                dtype = dtype.capitalize() if values.isna().any() else dtype
+            types[col] = dtype
+        elif downcast and pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col]):
+            # one type for every undeclared numeric column: an int column picks up NaN in some seasons (left joins),
+            # so any type chosen from the values would differ between Season partitions
+            types[col] = 'float32'
+    if bad:
+        raise ValueError('%s: values do not fit the declared dtype in %s' % (name or 'frame', ', '.join(bad)))
+    df = df.astype(types)
+    if report:
+        with lock:
+            reports.append({'frame': name, 'rows': len(df), 'before': before, 'after': df.memory_usage(deep=True).sum()})
+    return df
+
+'''
+memoryReport()
+    OUTPUT
+DataFrame with rows and MB before/after enforce() per frame (requires report = True while the frames are built)
+'''
+def memoryReport():
+    out = pd.DataFrame(reports, columns=['frame', 'rows', 'before', 'after'])
+    out[['before', 'after']] = out[['before', 'after']] / 1024**2
+    out['ratio'] = out['before'] / out['after']
+    return out
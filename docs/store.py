@@ -0,0 +1,173 @@
+import os
+import json
+import time
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# partition_col: tables holding this column are written as one Parquet partition per value (Season=2021/...)
+partition_col = 'Season'
+partitioning = ds.partitioning(pa.schema([(partition_col, pa.int64())]), flavor='hive')
+
+# key_cols: columns read() loads alongside any column projection (with the table's index levels), when stored
+key_cols = ['key_mlbam', partition_col]
+
+'''
+tablePath(path, name)
+    OUTPUT
+directory holding table name inside the store at path
+'''
+def tablePath(path, name):
+    return os.path.join(path, name)
+
+'''
+meta(path)
+    OUTPUT
+dict stored next to the tables (start_year, end_year, saved, tables, indexes, columns), or None if nothing is stored at path
+'''
+def meta(path):
+    try:
+        with open(os.path.join(path, 'meta.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def saveMeta(path, **info):
+    info = dict(meta(path) or {'tables': [], 'indexes': {}, 'columns': {}}, **info)
+    info['saved'] = time.time()
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(info, f, indent=1)
+
+'''
+write(path, name, df, replace)
+    INPUT
+path: store directory (created if missing)
+name: table name
+df: DataFrame to write; named index levels are stored as columns and restored by read()
+replace: True drops every stored partition first, False only overwrites the seasons present in df
+    NOTES
+Tables with a Season column are written partitioned by season; others as a single file. Parquet column statistics
+are written for every row group, so team/ID predicates can skip row groups as well as partitions.
+'''
+def write(path, name, df, replace=True):
+    index = [level for level in df.index.names if level is not None]
+    df = df.reset_index() if index else df
+    root = tablePath(path, name)
+    if partition_col in df.columns:
+        df = df.astype({partition_col: 'int64'})
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if partition_col in df.columns:
+        if replace:
+            shutil.rmtree(root, ignore_errors=True)
+        pq.write_to_dataset(table, root, partitioning=partitioning, existing_data_behavior='delete_matching')
+    else:
+        shutil.rmtree(root, ignore_errors=True)
+        os.makedirs(root)
+        pq.write_table(table, os.path.join(root, 'part-0.parquet'))
+    info = meta(path) or {'tables': [], 'indexes': {}, 'columns': {}}
+    saveMeta(path, tables=sorted(set(info['tables']) | {name}),
+             indexes=dict(info['indexes'], **{name: index}),
+             columns=dict(info['columns'], **{name: list(df.columns)}))
+
+'''
+save(path, frames, **info)
+    INPUT
+path: store directory
+frames: dict of table name -> DataFrame, each replacing the stored table
+**info: extra values recorded in meta.json (e.g. start_year, end_year)
+'''
+def save(path, frames, **info):
+    os.makedirs(path, exist_ok=True)
+    for name, df in frames.items():
+        write(path, name, df)
+    saveMeta(path, **info)
+
+'''
+read(path, name, columns, seasons, teams, team_col, memory_map)
+    INPUT
+path: store directory
+name: table name
+columns: columns to load (defaults to all); other columns are never deserialized. The table's index levels and
+key_cols are always loaded with them, so rows stay matched to their player and season
+seasons: iterable of seasons to load (e.g. range(2021, 2024)); other Season partitions are never opened
+teams: iterable of teams to load, checked against row group statistics before rows are decoded
+(a filter is skipped for tables without its column, e.g. seasons for bio/id)
+team_col: column teams is matched against ('Home' or 'Away' for game logs)
+memory_map: memory-map the Parquet files instead of reading them into buffers
+    OUTPUT
+DataFrame in stored column order (index restored when all of its columns were loaded)
+'''
+def read(path, name, columns=None, seasons=None, teams=None, team_col='Team', memory_map=False):
+    info = meta(path) or {}
+    order = info.get('columns', {}).get(name)
+    stored = order if order is not None else ds.dataset(tablePath(path, name), partitioning=partitioning).schema.names
+    expr = None
+    if seasons is not None and partition_col in stored:
+        expr = ds.field(partition_col).isin(list(seasons))
+    if teams is not None and team_col in stored:
+        team_expr = ds.field(team_col).isin(list(teams))
+        expr = team_expr if expr is None else expr & team_expr
+    if columns is not None:
+        keys = info.get('indexes', {}).get(name, []) + key_cols
+        columns = list(dict.fromkeys([col for col in keys if col in stored] + list(columns)))
+    table = pq.read_table(tablePath(path, name), columns=columns, filters=expr, memory_map=memory_map,
+                          partitioning=partitioning)
+    df = table.to_pandas()
+    if order is not None:
+        df = df[[col for col in order if col in df.columns]]
+    index = info.get('indexes', {}).get(name, [])
+    if index and all(level in df.columns for level in index):
+        df = df.set_index(index)
+    return df
+
+'''
+load(path, names, **kwargs)
+    INPUT
+path: store directory
+names: tables to read (defaults to every stored table)
+**kwargs: passed to read() for every table (columns, seasons, teams, memory_map)
+    OUTPUT
+dict of table name -> DataFrame
+'''
+def load(path, names=None, **kwargs):
+    names = meta(path)['tables'] if names is None else names
+    return {name: read(path, name, **kwargs) for name in names}
+
+'''
+merge(path, name, df, keys)
+    INPUT
+path: store directory
+name: table name
+df: new rows
+keys: natural key columns
+    NOTES
+Upserts df into the stored table: only the Season partitions present in df (or the whole table, if it has no Season
+column) are read and rewritten. A table that is not stored yet is written as is.
+'''
+def merge(path, name, df, keys):
+    info = meta(path)
+    if info is None or name not in info['tables']:
+        write(path, name, df)
+        return
+    partitioned = partition_col in info['columns'][name]
+    old = read(path, name, seasons=pd.unique(df[partition_col]).tolist() if partitioned else None)
+    write(path, name, upsert(old, df, keys), replace=not partitioned)
+
+'''
+upsert(old, new, keys)
+    INPUT
+old: stored DataFrame
+new: freshly fetched rows
+keys: natural key columns (index levels are matched too)
+    OUTPUT
+old without the rows whose key appears in new, followed by new
+'''
+def upsert(old, new, keys):
+    index = [name for name in old.index.names if name is not None]
+    if index:
+        old, new = old.reset_index(), new.reset_index()
+    hit = pd.MultiIndex.from_frame(old[keys]).isin(pd.MultiIndex.from_frame(new[keys]))
+    merged = pd.concat([old[~hit], new], ignore_index=True)
+    return merged.set_index(index) if index else merged